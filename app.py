@@ -1,16 +1,22 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import requests
 from io import BytesIO
+from functools import lru_cache
 from urllib.parse import quote
 import geopandas as gpd
+import pyarrow as pa
+import pyarrow.compute as pc
 import json
 
 # Imports dos módulos de gráficos
 from graficos.gerais.index import grafico_vendas_ao_longo_do_tempo, analise_comportamento_compra, grafico_pizza_tipo_ingresso_por_evento, ranking_eventos_por_publico, analise_turismo_por_periodo
 from graficos.demograficos.index import analise_demografica
+from graficos.formatacao import formatar_br
+from graficos.exportacao import csv_sob_demanda
 from graficos.geograficos.index import mapa_brasil, mapa_estado_rj, mapa_ras_capital, grafico_bairros_por_tipo_ingresso
 from clusters.index import analise_clusters_clientes, analise_clusters_geograficos
 
@@ -53,6 +59,47 @@ def get_font_sizes(escala=2):
     }
 
 
+# ==============================
+# Utilitários de exibição
+# ==============================
+# Limite de linhas exibidas nas amostras de dados brutos
+LIMITE_AMOSTRA = 1000
+
+
+# Rótulos dos dias da semana na ordem de Series.dt.weekday (0 = segunda)
+DIAS_SEMANA = ("Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo")
+
+# Dias em que o evento acontece (quarta a domingo)
+DIAS_EVENTO = ("Quarta", "Quinta", "Sexta", "Sábado", "Domingo")
+
+# Colunas exibidas na amostra de credenciamento, quando existirem
+COLUNAS_AMOSTRA_CRED = ("DATA", "NOME", "CATEGORIA", "EMPRESA", "ETAPA", "EVENTO", "ORIGEM")
+
+
+def rotular_dia_semana(datas):
+    """Converte datas em dia da semana categórico via códigos de weekday"""
+    codigos = datas.dt.weekday.fillna(-1).astype("int8").to_numpy()
+    return pd.Categorical.from_codes(codigos, categories=DIAS_SEMANA, ordered=True)
+
+
+@st.cache_data(show_spinner=False)
+def para_arrow(df):
+    """Converte o DataFrame para Arrow uma única vez por conteúdo"""
+    return pa.Table.from_pandas(df)
+
+
+@st.cache_data(show_spinner=False)
+def amostra_para_arrow(df):
+    """Converte a amostra para Arrow exibindo em branco os vazios das colunas de texto"""
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    for i, campo in enumerate(tabela.schema):
+        tipo = campo.type.value_type if pa.types.is_dictionary(campo.type) else campo.type
+        if pa.types.is_string(tipo) or pa.types.is_large_string(tipo):
+            texto = pc.cast(tabela.column(i), tipo)
+            tabela = tabela.set_column(i, campo.name, pc.fill_null(texto, ""))
+    return tabela
+
+
 # ==============================
 # Carregamento dos dados
 # ==============================
@@ -75,8 +122,14 @@ def load_file_from_github(url, headers):
     return file_obj
 
 
-@st.cache_data
+@st.cache_resource
 def load_data():
+    """
+    Carrega e prepara as bases brutas uma única vez por processo.
+    
+    Os DataFrames retornados são compartilhados entre sessões e reruns
+    (sem cópia nem hash), portanto devem ser tratados como somente leitura.
+    """
     # Base URL do repositório GitHub (raw)
     github_pat = st.secrets["github_pat"]
     github_base = "https://raw.githubusercontent.com/victorborba7/streamlit-apps-analise-bilheteria-data/main"
@@ -95,17 +148,19 @@ def load_data():
 
     # Garante CPF como string e padroniza formato
     if "TDL Customer CPF" in bilhetes.columns:
-        bilhetes["TDL Customer CPF"] = bilhetes["TDL Customer CPF"].astype(str)
-        # Remove valores inválidos (nan, None, etc)
-        bilhetes["TDL Customer CPF"] = bilhetes["TDL Customer CPF"].replace(['nan', 'None', 'NaN', ''], None)
+        cpf = bilhetes["TDL Customer CPF"].astype(str)
+        # Remove valores inválidos (nan, None, etc) como nulos reais
+        cpf = cpf.where(~cpf.isin(['nan', 'None', 'NaN', '']))
         # Preenche com zeros à esquerda para ter 11 dígitos
-        bilhetes["TDL Customer CPF"] = bilhetes["TDL Customer CPF"].apply(
-            lambda x: x.zfill(11) if x is not None and x not in ['nan', 'None', 'NaN', ''] else None
-        )
+        bilhetes["TDL Customer CPF"] = cpf.str.zfill(11)
 
     if "Status do ingresso":
         bilhetes = bilhetes[(bilhetes["Status do ingresso"].str.contains("Cancelado") == False) | (bilhetes["Status do ingresso"].isna())]
 
+    # Quantidade de ingressos por linha cabe em inteiros estreitos (somas voltam em int64)
+    if "TDL Sum Tickets (B+S-A)" in bilhetes.columns:
+        bilhetes["TDL Sum Tickets (B+S-A)"] = pd.to_numeric(bilhetes["TDL Sum Tickets (B+S-A)"], downcast="integer")
+
     # Processa data de nascimento e calcula idade
     if "TDL Customer Birth Date" in bilhetes.columns:
         bilhetes["TDL Customer Birth Date"] = pd.to_datetime(bilhetes["TDL Customer Birth Date"], errors="coerce")
@@ -118,19 +173,35 @@ def load_data():
             labels=["Menor de 18", "18-24", "25-34", "35-44", "45-54", "55-64", "65+"]
         )
 
+    # Colunas de filtro/agrupamento como categóricas (códigos inteiros)
+    # O CPF também: contagens distintas passam a ser feitas sobre os códigos
+    for col in ["TDL Event", "RA", "TDL Customer Country", "TDL Price Category", "TDL Customer CPF"]:
+        if col in bilhetes.columns:
+            bilhetes[col] = bilhetes[col].astype("category")
+
+    # Adiciona coluna de dia da semana
+    if "TDL Event Date" in bilhetes.columns:
+        bilhetes["dia_semana_label"] = rotular_dia_semana(bilhetes["TDL Event Date"])
+
     # ==============================
     # Concatenação final
     # ==============================
-    bilhetes_final = bilhetes.copy()
+    bilhetes_final = bilhetes
 
     # ==============================
     # Credenciamento
     # ==============================
     cred_filename = quote("Credenciamento.xlsx")
     cred_url = f"{github_base}/data/raw/{cred_filename}"
-    cred_2025 = pd.read_excel(load_file_from_github(cred_url, headers), sheet_name="Staff", engine='openpyxl')
-    artistico_2025 = pd.read_excel(load_file_from_github(cred_url, headers), sheet_name="Artistico", engine='openpyxl')
-    desm_2024 = pd.read_excel(load_file_from_github(cred_url, headers), sheet_name="Desmontagem_2024", engine='openpyxl')
+    # Baixa e abre a planilha uma única vez, lendo as três abas juntas
+    abas_cred = pd.read_excel(
+        load_file_from_github(cred_url, headers),
+        sheet_name=["Staff", "Artistico", "Desmontagem_2024"],
+        engine='openpyxl'
+    )
+    cred_2025 = abas_cred["Staff"]
+    artistico_2025 = abas_cred["Artistico"]
+    desm_2024 = abas_cred["Desmontagem_2024"]
     
     # Normaliza os nomes das colunas
     cred_2025.columns = cred_2025.columns.str.strip().str.upper()
@@ -228,38 +299,63 @@ def load_data():
             cred_2025.loc[mask_numerico, col] = cred_2025.loc[mask_numerico, col].str.zfill(11)
     
     # Converte todas as colunas object para string para evitar erros do PyArrow - 2025
+    # (vazios continuam como nulos reais em vez de 'nan'/'None')
     for col in cred_2025.columns:
         if cred_2025[col].dtype == 'object' and col != 'DATA' and col not in cpf_columns_2025:
-            cred_2025[col] = cred_2025[col].astype(str)
+            texto = cred_2025[col].astype(str)
+            cred_2025[col] = texto.where(~texto.isin(['nan', 'None', 'NaN', '', '<NA>', 'nat']))
     
     # Adiciona informação de evento baseado na data - 2025
     if "TDL Event Date" in bilhetes_final.columns and "TDL Event" in bilhetes_final.columns:
         mapa_data_evento = (
             bilhetes_final[["TDL Event Date", "TDL Event"]]
+            # Pares (data, evento) únicos antes de ficar com o último por data, como o dict fazia
             .drop_duplicates()
+            .drop_duplicates("TDL Event Date", keep="last")
             .set_index("TDL Event Date")["TDL Event"]
-            .to_dict()
         )
         
         if "DATA" in cred_2025.columns:
-            cred_2025["EVENTO"] = cred_2025["DATA"].map(mapa_data_evento)
+            # Categórico com categorias ordenadas: o filtro lê as opções direto das categorias
+            cred_2025["EVENTO"] = pd.Categorical(mapa_data_evento.reindex(cred_2025["DATA"]).to_numpy())
+
+    # Agrupa PATROCINADOR e PATROCINADOR MM como STAFF
+    if "CATEGORIA" in cred_2025.columns:
+        cred_2025.loc[cred_2025["CATEGORIA"].isin(["PATROCINADOR", "PATROCINADOR MM"]), "CATEGORIA"] = "STAFF"
+
+    # Colunas de filtro/agrupamento como categóricas (códigos inteiros)
+    for col in ["CATEGORIA", "EMPRESA", "ETAPA", "ORIGEM"]:
+        if col in cred_2025.columns:
+            cred_2025[col] = cred_2025[col].astype("category")
+
+    # Demais textos (nome, CPF, funções...) como strings Arrow: nulos reais e comparações vetorizadas
+    for col in cred_2025.select_dtypes(include="object").columns:
+        if col != 'DATA':
+            cred_2025[col] = cred_2025[col].astype("string[pyarrow]")
+
+    # Ordena por data para que filtros de período virem fatias contíguas
+    if "DATA" in cred_2025.columns:
+        cred_2025 = cred_2025.sort_values("DATA", kind="stable", na_position="first").reset_index(drop=True)
+
+        # Cria coluna com dia da semana
+        cred_2025["dia_label"] = rotular_dia_semana(cred_2025["DATA"])
     
     # Processa dados de 2024
     if "DATA" in desm_2024.columns:
         desm_2024["DATA"] = pd.to_datetime(desm_2024["DATA"], errors="coerce")
     
     # Converte todas as colunas object para string para evitar erros do PyArrow - 2024
+    # (vazios continuam como nulos reais em vez de 'nan'/'None')
     for col in desm_2024.columns:
         if desm_2024[col].dtype == 'object' and col != 'DATA':
-            desm_2024[col] = desm_2024[col].astype(str)
+            texto = desm_2024[col].astype(str)
+            desm_2024[col] = texto.where(~texto.isin(['nan', 'None', 'NaN', '', '<NA>', 'nat']))
     
     # Tratamento especial para colunas de CPF - 2024
     cpf_columns_2024 = [col for col in desm_2024.columns if 'CPF' in col.upper()]
     for col in cpf_columns_2024:
-        desm_2024[col] = desm_2024[col].replace(['nan', 'None', 'NaN', ''], None)
-        desm_2024[col] = desm_2024[col].apply(
-            lambda x: x.zfill(11) if x is not None and x not in ['nan', 'None', 'NaN', '', 'None'] else None
-        )
+        cpf = desm_2024[col].where(~desm_2024[col].isin(['nan', 'None', 'NaN', '']))
+        desm_2024[col] = cpf.str.zfill(11)
 
     return bilhetes_final, cred_2025, desm_2024
 
@@ -318,6 +414,660 @@ def carregar_geojson_municipios_rj():
         return None
 
 
+# ==============================
+# Filtros
+# ==============================
+@st.cache_data(show_spinner=False, max_entries=32)
+def selecionar_linhas_bilhetes(evento_sel=(), periodo=None, pais_sel=(), tipo_ingresso_sel=(), ra_sel=(), dia_semana_sel=()):
+    """
+    Posições das linhas da bilhetagem que passam nos filtros (None quando não há filtro).
+    
+    O cache guarda só esse vetor de posições, indexado pelas seleções (tuplas):
+    reruns sem mudança de filtro não refazem as máscaras.
+    """
+    df_b, _, _ = load_data()
+    pais_col = "TDL Customer Country"
+    tipo_ingresso_col = "TDL Price Category"
+
+    # Acumula as máscaras e as combina uma única vez
+    mascaras = []
+
+    if evento_sel:
+        mascaras.append(df_b["TDL Event"].isin(evento_sel).to_numpy())
+
+    if periodo is not None and isinstance(periodo, (list, tuple)) and len(periodo) == 2:
+        # Compara direto no array datetime64 (NaT nunca entra no intervalo)
+        ini, fim = np.datetime64(periodo[0], "ns"), np.datetime64(periodo[1], "ns")
+        datas = df_b["TDL Event Date"].to_numpy(dtype="datetime64[ns]")
+        mascaras.append((datas >= ini) & (datas <= fim))
+
+    if pais_sel and pais_col in df_b.columns:
+        mascaras.append(df_b[pais_col].isin(pais_sel).to_numpy())
+
+    if tipo_ingresso_sel and tipo_ingresso_col in df_b.columns:
+        mascaras.append(df_b[tipo_ingresso_col].isin(tipo_ingresso_sel).to_numpy())
+
+    if ra_sel:
+        mascaras.append(df_b["RA"].isin(ra_sel).to_numpy())
+
+    if dia_semana_sel and "dia_semana_label" in df_b.columns:
+        mascaras.append(df_b["dia_semana_label"].isin(dia_semana_sel).to_numpy())
+
+    if not mascaras:
+        return None
+    return np.flatnonzero(np.logical_and.reduce(mascaras))
+
+
+def filtrar_bilhetes(*filtros):
+    """
+    Aplica os filtros da bilhetagem sobre a base carregada (somente leitura).
+    
+    Recorta o DataFrame do cache_resource pelas posições em cache; sem filtro
+    devolve a própria base, sem cópia. Usado pelas abas de bilhetagem e de clusters.
+    """
+    df_b, _, _ = load_data()
+    linhas = selecionar_linhas_bilhetes(*filtros)
+    if linhas is None:
+        return df_b
+    return df_b.iloc[linhas]
+
+
+def opcoes_coluna(df, col):
+    """Lista ordenada de valores de uma coluna (categorias, quando categórica)"""
+    if col not in df.columns:
+        return None
+    if df[col].dtype == "category":
+        return list(df[col].cat.categories)
+    return sorted(df[col].dropna().unique())
+
+
+@st.cache_data(show_spinner=False)
+def opcoes_filtros():
+    """
+    Monta as opções de todos os filtros uma única vez por carga dos dados.
+    
+    Retorna um dicionário com as listas de cada multiselect e os limites
+    de data dos períodos (None quando a coluna não existe).
+    """
+    bilhetes, cred, _ = load_data()
+
+    def dias_presentes(df, col):
+        if col not in df.columns:
+            return None
+        presentes = set(df[col].dropna().unique())
+        return [d for d in DIAS_SEMANA if d in presentes]
+
+    def limites(df, col):
+        if col not in df.columns or not df[col].notna().any():
+            return None
+        return df[col].min(), df[col].max()
+
+    return {
+        "eventos": opcoes_coluna(bilhetes, "TDL Event"),
+        "periodo": limites(bilhetes, "TDL Event Date"),
+        "dias_semana": dias_presentes(bilhetes, "dia_semana_label"),
+        "ras": opcoes_coluna(bilhetes, "RA"),
+        "paises": opcoes_coluna(bilhetes, "TDL Customer Country"),
+        "tipos_ingresso": opcoes_coluna(bilhetes, "TDL Price Category"),
+        "etapas": opcoes_coluna(cred, "ETAPA"),
+        "categorias": opcoes_coluna(cred, "CATEGORIA"),
+        "empresas": opcoes_coluna(cred, "EMPRESA"),
+        "eventos_cred": opcoes_coluna(cred, "EVENTO"),
+        "origens": opcoes_coluna(cred, "ORIGEM"),
+        "dias_cred": dias_presentes(cred, "dia_label"),
+        "periodo_cred": limites(cred, "DATA"),
+    }
+
+
+# ==============================
+# Aba de credenciamento
+# ==============================
+@st.cache_data(show_spinner=False)
+def profissionais_por_dia_semana(df_dia, cpf_col):
+    """Conta profissionais por dia da semana, com percentual sobre o total"""
+    # Códigos da categórica ordenada (-1 = sem dia); sem CPF a linha não conta
+    codigos = df_dia["dia_label"].cat.codes.to_numpy()
+    codigos = codigos[df_dia[cpf_col].notna().to_numpy() & (codigos >= 0)]
+    # Contagem por dia já na ordem de segunda a domingo, mantendo só os dias presentes
+    contagem = np.bincount(codigos, minlength=len(DIAS_SEMANA))
+    presentes = np.flatnonzero(contagem)
+    profissionais_por_dia = pd.DataFrame({
+        "dia_label": pd.Categorical.from_codes(presentes, categories=DIAS_SEMANA, ordered=True),
+        "Total": contagem[presentes]
+    })
+    
+    # Calcula percentuais em uma única operação vetorial
+    totais = profissionais_por_dia["Total"].to_numpy()
+    profissionais_por_dia["Percentual"] = np.round(totais * (100.0 / max(totais.sum(), 1)), 1)
+    return profissionais_por_dia
+
+
+@lru_cache(maxsize=8)
+def colunas_amostra_cred(colunas, cpf_col):
+    """Colunas da amostra de credenciamento presentes na base, com o CPF em segundo"""
+    colunas_df = set(colunas)
+    colunas_exibir = [col for col in COLUNAS_AMOSTRA_CRED if col in colunas_df]
+    
+    # Adiciona coluna CPF se existir
+    if cpf_col:
+        colunas_exibir.insert(1, cpf_col)
+    return tuple(colunas_exibir)
+
+
+@st.fragment
+def render_credenciamento(cred_2025, opcoes, escala):
+    """
+    Renderiza a aba de credenciamento como fragmento.
+    
+    Interações com os filtros da aba reexecutam apenas este trecho, sem
+    refazer as análises de bilhetagem e clusters.
+    """
+    st.subheader("👷 Análises de Credenciamento 2025")
+
+    # Somente leitura: os filtros abaixo sempre geram novos frames
+    cred = cred_2025
+
+    # Coluna de CPF resolvida uma única vez para toda a aba
+    cpf_col_cred = next((col for col in cred.columns if 'CPF' in col.upper()), None)
+
+    # Filtros - Linha 1
+    col1, col2, col3 = st.columns(3)
+
+    # Etapa
+    if opcoes["etapas"] is not None:
+        etapa_sel = col1.multiselect("Etapa", opcoes["etapas"])
+    else:
+        etapa_sel = []
+
+    # Categoria
+    if opcoes["categorias"] is not None:
+        cat_sel = col2.multiselect("Categoria", opcoes["categorias"])
+    else:
+        cat_sel = []
+
+    # Empresa
+    if opcoes["empresas"] is not None:
+        emp_sel = col3.multiselect("Empresa", opcoes["empresas"])
+    else:
+        emp_sel = []
+
+    # Filtros - Linha 2
+    col4, col5, col6 = st.columns(3)
+
+    # Evento
+    if opcoes["eventos_cred"] is not None:
+        evento_cred_sel = col4.multiselect("Evento", opcoes["eventos_cred"], key="evento_cred")
+    else:
+        evento_cred_sel = []
+
+    # Origem (2025 ou Desmontagem 2024)
+    if opcoes["origens"] is not None:
+        origem_sel = col5.multiselect("Ano/Evento", opcoes["origens"])
+    else:
+        origem_sel = []
+
+    # Dia da Semana
+    if opcoes["dias_cred"] is not None:
+        dia_semana_cred_sel = col6.multiselect("Dia da Semana", opcoes["dias_cred"])
+    else:
+        dia_semana_cred_sel = []
+
+    # Filtros - Linha 3
+    col7, col8, col9 = st.columns(3)
+
+    # Período de data
+    if opcoes["periodo_cred"] is not None:
+        data_min_cred, data_max_cred = opcoes["periodo_cred"]
+        periodo_cred = col7.date_input(
+            "Período de credenciamento",
+            value=(data_min_cred, data_max_cred),
+            min_value=data_min_cred,
+            max_value=data_max_cred,
+            key="periodo_cred"
+        )
+    else:
+        periodo_cred = None
+
+    # Aplica filtros
+    df_c = cred
+
+    # DATA vem ordenada do load_data: o período é localizado por busca binária
+    if periodo_cred is not None and isinstance(periodo_cred, (list, tuple)) and len(periodo_cred) == 2:
+        ini_cred, fim_cred = periodo_cred
+        datas_cred = df_c["DATA"].to_numpy(dtype="datetime64[ns]").view("i8")
+        inicio = datas_cred.searchsorted(np.datetime64(ini_cred, "ns").astype(np.int64))
+        fim = datas_cred.searchsorted(np.datetime64(fim_cred, "ns").astype(np.int64), side="right")
+        df_c = df_c.iloc[inicio:fim]
+
+    # Demais filtros combinados em uma única máscara
+    mascaras_cred = []
+    if etapa_sel and "ETAPA" in df_c.columns:
+        mascaras_cred.append(df_c["ETAPA"].isin(etapa_sel).to_numpy())
+    if cat_sel and "CATEGORIA" in df_c.columns:
+        mascaras_cred.append(df_c["CATEGORIA"].isin(cat_sel).to_numpy())
+    if emp_sel and "EMPRESA" in df_c.columns:
+        mascaras_cred.append(df_c["EMPRESA"].isin(emp_sel).to_numpy())
+    if evento_cred_sel and "EVENTO" in df_c.columns:
+        mascaras_cred.append(df_c["EVENTO"].isin(evento_cred_sel).to_numpy())
+    if origem_sel and "ORIGEM" in df_c.columns:
+        mascaras_cred.append(df_c["ORIGEM"].isin(origem_sel).to_numpy())
+    if dia_semana_cred_sel and "dia_label" in df_c.columns:
+        mascaras_cred.append(df_c["dia_label"].isin(dia_semana_cred_sel).to_numpy())
+    if mascaras_cred:
+        df_c = df_c[np.logical_and.reduce(mascaras_cred)]
+
+    # Métricas gerais
+    st.markdown("#### Visão geral")
+    col_a, col_b, col_c = st.columns(3)
+
+    # Total de credenciamentos (total de registros)
+    total_credenciamentos = len(df_c)
+    col_a.metric("Total de credenciamentos", int(total_credenciamentos))
+    
+    # Conta profissionais únicos por CPF
+    if cpf_col_cred:
+        # Remove valores None/nan antes de contar
+        cpf_unicos = df_c.loc[df_c[cpf_col_cred].notna(), cpf_col_cred].nunique()
+        col_b.metric("Profissionais únicos (CPF)", int(cpf_unicos))
+    elif "CATEGORIA" in df_c.columns:
+        total_categorias = df_c["CATEGORIA"].nunique()
+        col_b.metric("Categorias únicas", int(total_categorias))
+    
+    if "EMPRESA" in df_c.columns:
+        total_empresas = df_c["EMPRESA"].nunique()
+        col_c.metric("Empresas envolvidas", int(total_empresas))
+
+    # Sem registros no recorte: encerra a aba antes de montar tabelas e gráficos vazios
+    if df_c.empty:
+        st.info("Não há registros de credenciamento para os filtros selecionados.")
+        return
+
+    # Gráfico de pizza: Contagem por Categoria
+    st.markdown("---")
+    st.markdown("#### 📊 Distribuição de Credenciamentos por Categoria")
+    
+    # Filtra categorias válidas uma única vez para todas as análises por categoria
+    if "CATEGORIA" in df_c.columns:
+        df_c_cat_validas = df_c[df_c["CATEGORIA"].notna()]
+
+    if "CATEGORIA" in df_c.columns:
+        if not df_c_cat_validas.empty:
+            # Conta credenciamentos por categoria
+            contagem_categoria = (
+                df_c_cat_validas["CATEGORIA"]
+                .value_counts()
+                .loc[lambda contagem: contagem > 0]
+                .reset_index()
+            )
+            contagem_categoria.columns = ["Categoria", "Quantidade"]
+            
+            # Calcula percentuais
+            total_cat_pizza = contagem_categoria["Quantidade"].sum()
+            contagem_categoria["Percentual"] = (contagem_categoria["Quantidade"] / total_cat_pizza * 100).round(2)
+            
+            # Layout com duas colunas: gráfico e tabela
+            col_grafico_cat, col_tabela_cat = st.columns([2, 1])
+            
+            with col_grafico_cat:
+                # Cria gráfico de pizza
+                fig_pizza_cat = px.pie(
+                    contagem_categoria,
+                    values="Quantidade",
+                    names="Categoria",
+                    title="Credenciamentos por Categoria",
+                    hole=0.4,
+                    color_discrete_sequence=px.colors.qualitative.Set3
+                )
+                
+                fonts = get_font_sizes(escala)
+                fig_pizza_cat.update_traces(
+                    textposition='auto',
+                    textinfo='percent+label',
+                    textfont_size=fonts['annotation']
+                )
+                fig_pizza_cat.update_layout(
+                    title_font_size=fonts['title'],
+                    legend_font_size=fonts['legend'],
+                    font_size=fonts['annotation'],
+                    height=500
+                )
+                
+                st.plotly_chart(fig_pizza_cat, use_container_width=True, config=get_plotly_config(escala))
+            
+            with col_tabela_cat:
+                # Exibe tabela com os dados
+                contagem_categoria_display = contagem_categoria.copy()
+                contagem_categoria_display["Percentual"] = contagem_categoria_display["Percentual"].astype(str) + "%"
+                contagem_categoria_display.index = range(1, len(contagem_categoria_display) + 1)
+                
+                st.markdown("#### Detalhamento")
+                st.dataframe(contagem_categoria_display, use_container_width=True, height=500)
+            
+            # Botão de download
+            st.download_button(
+                label="📥 Download Contagem por Categoria (CSV)",
+                data=csv_sob_demanda(contagem_categoria_display, index=True),
+                file_name="credenciamento_por_categoria.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
+        else:
+            st.info("Não há dados válidos de categoria disponíveis.")
+    else:
+        st.info("Coluna de categoria não disponível nos dados.")
+
+    st.markdown("---")
+    # Análise de profissionais por categoria e dia
+    if "CATEGORIA" in df_c.columns and "DATA" in df_c.columns:
+        st.markdown("#### Profissionais por Categoria e Dia")
+        
+        # Conta profissionais por categoria e data
+        if cpf_col_cred:
+            df_c_cat_dia = df_c_cat_validas[
+                df_c_cat_validas[cpf_col_cred].notna().to_numpy()
+                & df_c_cat_validas["DATA"].notna().to_numpy()
+            ]
+            # Tabela data x categoria em uma única passada sobre os códigos da CATEGORIA
+            # (categorias sem profissionais no recorte saem depois, sem recodificar a coluna)
+            tabela_cat_dia = pd.crosstab(
+                df_c_cat_dia["DATA"].rename("Data"),
+                df_c_cat_dia["CATEGORIA"].rename("Categoria")
+            ).astype(np.int32)
+            tabela_cat_dia = tabela_cat_dia.loc[:, tabela_cat_dia.to_numpy().any(axis=0)]
+            
+            if not tabela_cat_dia.empty:
+                # Formato longo (categoria, data) para o gráfico empilhado
+                prof_por_cat_dia = tabela_cat_dia.unstack().reset_index(name="Profissionais")
+                prof_por_cat_dia = prof_por_cat_dia[prof_por_cat_dia["Profissionais"] > 0]
+                
+                # Mantém a data como datetime e formata apenas o índice exibido
+                tabela_cat_dia.index = tabela_cat_dia.index.strftime("%d/%m/%Y").rename("Data")
+                
+                # Adiciona total por linha
+                tabela_cat_dia['Total'] = tabela_cat_dia.to_numpy().sum(axis=1)
+                
+                st.dataframe(para_arrow(tabela_cat_dia), use_container_width=True)
+                
+                with st.expander("📊 Ver gráfico"):
+                    # Gráfico de barras empilhadas
+                    # Calcula total por dia para mostrar no topo
+                    total_por_dia_cat = prof_por_cat_dia.groupby("Data")["Profissionais"].sum().reset_index()
+                    total_por_dia_cat.columns = ["Data", "Total"]
+                    
+                    # Monta uma trace por categoria direto, sem a introspecção do px
+                    fig_cat_dia = go.Figure([
+                        go.Bar(
+                            x=grupo["Data"],
+                            y=grupo["Profissionais"],
+                            name=str(categoria),
+                            legendgroup=str(categoria)
+                        )
+                        for categoria, grupo in prof_por_cat_dia.groupby("Categoria", observed=True, sort=False)
+                    ])
+                    fig_cat_dia.update_layout(
+                        barmode="stack",
+                        title="Profissionais por categoria e dia",
+                        xaxis_title="Data",
+                        yaxis_title="Profissionais",
+                        legend_title_text="Categoria"
+                    )
+                    
+                    # Adiciona o total no topo de cada barra com uma única trace de texto
+                    fig_cat_dia.add_trace(go.Scatter(
+                        x=total_por_dia_cat["Data"],
+                        y=total_por_dia_cat["Total"],
+                        text=total_por_dia_cat["Total"].map("{:.0f}".format),
+                        mode="text",
+                        textposition="top center",
+                        textfont=dict(size=12, family="Arial Black"),
+                        cliponaxis=False,
+                        hoverinfo="skip",
+                        showlegend=False
+                    ))
+                    
+                    fonts = get_font_sizes(escala)
+                    fig_cat_dia.update_layout(
+                        height=500,
+                        title_font_size=fonts['title'],
+                        xaxis_title_font_size=fonts['axis'],
+                        yaxis_title_font_size=fonts['axis'],
+                        xaxis_tickfont_size=fonts['tick'],
+                        yaxis_tickfont_size=fonts['tick'],
+                        legend_font_size=fonts['legend']
+                    )
+                    st.plotly_chart(fig_cat_dia, use_container_width=True, config=get_plotly_config(escala))
+            else:
+                st.info("Não há dados de categorias mapeadas para o período selecionado.")
+        
+        st.markdown("---")
+    
+    # Profissionais e fornecedores únicos por categoria em uma única agregação
+    agregacoes_cat = {}
+    if cpf_col_cred:
+        agregacoes_cat["Total"] = (cpf_col_cred, "count")
+    if "EMPRESA" in df_c.columns:
+        agregacoes_cat["Fornecedores"] = ("EMPRESA", "nunique")
+    if "CATEGORIA" in df_c.columns and agregacoes_cat:
+        resumo_cat = df_c_cat_validas.groupby("CATEGORIA", observed=True).agg(**agregacoes_cat)
+
+    st.markdown("#### (a) Total de profissionais por categoria")
+    if "CATEGORIA" in df_c.columns and cpf_col_cred:
+        total_cat = resumo_cat["Total"].reset_index()
+        total_cat = total_cat.sort_values("Total", ascending=False)
+
+        # Calcula percentuais
+        total_geral = total_cat["Total"].sum()
+        total_cat["Percentual"] = (total_cat["Total"] / total_geral * 100).round(1)
+        
+        fig_total = px.bar(
+            total_cat,
+            x="CATEGORIA",
+            y="Total",
+            labels={
+                "CATEGORIA": "Categoria",
+                "Total": "Total de profissionais"
+            },
+            title="Total de profissionais por categoria",
+            text=total_cat["Percentual"].astype(str) + "%",
+            color="Total",
+            color_continuous_scale="Blues",
+            category_orders={"CATEGORIA": total_cat["CATEGORIA"].tolist()}
+        )
+        
+        fonts = get_font_sizes(escala)
+        fig_total.update_traces(textposition='outside', textfont_size=fonts['annotation'])
+        fig_total.update_layout(
+            height=500,
+            showlegend=False,
+            title_font_size=fonts['title'],
+            xaxis_title_font_size=fonts['axis'],
+            yaxis_title_font_size=fonts['axis'],
+            xaxis_tickfont_size=fonts['tick'],
+            yaxis_tickfont_size=fonts['tick']
+        )
+        
+        st.plotly_chart(fig_total, use_container_width=True, config=get_plotly_config(escala))
+        
+        with st.expander("📊 Ver dados da tabela"):
+            total_cat_display = total_cat.copy()
+            total_cat_display.columns = ["Categoria", "Total de Profissionais", "Percentual (%)"]
+            st.dataframe(total_cat_display, hide_index=True, use_container_width=True)
+
+    st.markdown("#### Número de Fornecedores por Categoria")
+    if "CATEGORIA" in df_c.columns and "EMPRESA" in df_c.columns:
+        # Mantém apenas categorias com ao menos uma empresa informada
+        fornecedores_por_cat = (
+            resumo_cat.loc[resumo_cat["Fornecedores"] > 0, "Fornecedores"]
+            .reset_index()
+            .sort_values("Fornecedores", ascending=False)
+        )
+        fornecedores_por_cat.columns = ["Categoria", "Fornecedores"]
+        
+        # Calcula percentuais
+        total_fornecedores_graf = fornecedores_por_cat["Fornecedores"].sum()
+        fornecedores_por_cat["Percentual"] = (fornecedores_por_cat["Fornecedores"] / total_fornecedores_graf * 100).round(1)
+        
+        fig_fornecedores = px.bar(
+            fornecedores_por_cat,
+            x="Categoria",
+            y="Fornecedores",
+            labels={
+                "Categoria": "Categoria",
+                "Fornecedores": "Número de Fornecedores"
+            },
+            title="Fornecedores únicos por categoria",
+            text=fornecedores_por_cat["Percentual"].astype(str) + "%",
+            color="Fornecedores",
+            color_continuous_scale="Blues",
+            category_orders={"Categoria": fornecedores_por_cat["Categoria"].tolist()}
+        )
+        
+        fonts = get_font_sizes(escala)
+        fig_fornecedores.update_traces(textposition='outside', textfont_size=fonts['annotation'])
+        fig_fornecedores.update_layout(
+            height=500,
+            showlegend=False,
+            title_font_size=fonts['title'],
+            xaxis_title_font_size=fonts['axis'],
+            yaxis_title_font_size=fonts['axis'],
+            xaxis_tickfont_size=fonts['tick'],
+            yaxis_tickfont_size=fonts['tick']
+        )
+        
+        st.plotly_chart(fig_fornecedores, use_container_width=True, config=get_plotly_config(escala))
+        
+        with st.expander("📊 Ver dados da tabela"):
+            st.dataframe(fornecedores_por_cat, hide_index=True, use_container_width=True)
+
+    st.markdown("#### (b) Total de profissionais por categoria em cada dia do evento")
+    if "dia_label" in df_c.columns and "CATEGORIA" in df_c.columns and cpf_col_cred:
+        # Filtra apenas os dias do evento (qua a dom) e remove NaN
+        df_c_evento = df_c_cat_validas[df_c_cat_validas["dia_label"].isin(DIAS_EVENTO)]
+        
+        if not df_c_evento.empty:
+            # Matriz dia x categoria em uma passada com bincount sobre os códigos categóricos
+            com_cpf = df_c_evento[cpf_col_cred].notna().to_numpy()
+            codigos_dia = df_c_evento["dia_label"].cat.codes.to_numpy()[com_cpf].astype(np.int64)
+            codigos_cat = df_c_evento["CATEGORIA"].cat.codes.to_numpy()[com_cpf]
+            categorias_evento = df_c_evento["CATEGORIA"].cat.categories
+            n_cat = len(categorias_evento)
+            matriz_dia_cat = np.bincount(
+                codigos_dia * n_cat + codigos_cat, minlength=len(DIAS_SEMANA) * n_cat
+            ).reshape(len(DIAS_SEMANA), n_cat)
+            # Índice já é a categórica ordenada dos dias: o formato longo sai na ordem certa
+            contagem_dia_cat = pd.DataFrame(
+                matriz_dia_cat,
+                index=pd.CategoricalIndex(DIAS_SEMANA, categories=DIAS_SEMANA, ordered=True, name="dia_label"),
+                columns=pd.Index(categorias_evento, name="CATEGORIA")
+            ).loc[list(DIAS_EVENTO)]
+
+            total_cat_dia = contagem_dia_cat.stack().reset_index(name="Total")
+            total_cat_dia = total_cat_dia[total_cat_dia["Total"] > 0]
+
+            # Calcula total por dia
+            total_por_dia = total_cat_dia.groupby("dia_label", observed=True)["Total"].sum().reset_index()
+            total_por_dia.columns = ["dia_label", "Total_Dia"]
+            
+            # Calcula percentual de cada dia em relação ao total geral
+            total_geral = total_por_dia["Total_Dia"].sum()
+            total_por_dia["Percentual_Dia"] = (total_por_dia["Total_Dia"] / total_geral * 100).round(1)
+            
+            fig_total = px.bar(
+                total_cat_dia,
+                x="dia_label",
+                y="Total",
+                color="CATEGORIA",
+                barmode="stack",
+                labels={
+                    "dia_label": "Dia da Semana",
+                    "Total": "Total de profissionais",
+                    "CATEGORIA": "Categoria"
+                },
+                title="Total de profissionais por categoria em cada dia do evento"
+            )
+            
+            # Adiciona percentual no topo de cada barra com uma única trace de texto
+            fig_total.add_trace(go.Scatter(
+                x=total_por_dia["dia_label"],
+                y=total_por_dia["Total_Dia"],
+                text=(
+                    total_por_dia["Percentual_Dia"].map("{:.1f}%".format)
+                    + "<br>(n=" + total_por_dia["Total_Dia"].map("{:.0f}".format) + ")"
+                ),
+                mode="text",
+                textposition="top center",
+                textfont=dict(size=11, color="white", family="Arial"),
+                cliponaxis=False,
+                hoverinfo="skip",
+                showlegend=False
+            ))
+            
+            fonts = get_font_sizes(escala)
+            fig_total.update_layout(
+                height=500,
+                yaxis_title="Percentual (%)",
+                title_font_size=fonts['title'],
+                xaxis_title_font_size=fonts['axis'],
+                yaxis_title_font_size=fonts['axis'],
+                xaxis_tickfont_size=fonts['tick'],
+                yaxis_tickfont_size=fonts['tick'],
+                legend_font_size=fonts['legend']
+            )
+            st.plotly_chart(fig_total, use_container_width=True, config=get_plotly_config(escala))
+            
+            with st.expander("📊 Ver dados da tabela"):
+                # Reaproveita a matriz dia x categoria, mantendo só dias e categorias com profissionais
+                matriz_evento = contagem_dia_cat.to_numpy()
+                tabela_total_dia = contagem_dia_cat.loc[
+                    matriz_evento.sum(axis=1) > 0, matriz_evento.sum(axis=0) > 0
+                ].astype(np.int32)
+                st.dataframe(tabela_total_dia, use_container_width=True)
+        else:
+            st.info("Não há dados para os dias do evento (quarta a domingo).")
+
+    st.markdown("#### Distribuição por dia da semana")
+    if "dia_label" in df_c.columns and cpf_col_cred:
+        # Passa só as colunas usadas para o hash do cache ser barato
+        profissionais_por_dia = profissionais_por_dia_semana(df_c[["dia_label", cpf_col_cred]], cpf_col_cred)
+        
+        # Gráfico de poucas barras: monta a trace direto, sem a introspecção do px
+        fig_dia = go.Figure(go.Bar(
+            x=profissionais_por_dia["dia_label"].to_numpy(),
+            y=profissionais_por_dia["Total"].to_numpy(),
+            text=(profissionais_por_dia["Percentual"].astype(str) + "%").to_numpy()
+        ))
+        fig_dia.update_layout(
+            title="Total de profissionais por dia da semana",
+            xaxis_title="Dia da Semana",
+            yaxis_title="Total de profissionais"
+        )
+        fonts = get_font_sizes(escala)
+        fig_dia.update_traces(textposition='outside', textfont_size=fonts['annotation'])
+        fig_dia.update_layout(
+            title_font_size=fonts['title'],
+            xaxis_title_font_size=fonts['axis'],
+            yaxis_title_font_size=fonts['axis'],
+            xaxis_tickfont_size=fonts['tick'],
+            yaxis_tickfont_size=fonts['tick']
+        )
+        st.plotly_chart(fig_dia, use_container_width=True, config=get_plotly_config(escala))
+        
+        with st.expander("📊 Ver dados da tabela"):
+            profissionais_por_dia_display = profissionais_por_dia[["dia_label", "Total", "Percentual"]].copy()
+            profissionais_por_dia_display.columns = ["Dia da Semana", "Total de Profissionais", "Percentual (%)"]
+            st.dataframe(profissionais_por_dia_display, hide_index=True, use_container_width=True)
+
+    st.markdown("#### Amostra dos dados de credenciamento")
+    
+    # Seleciona as colunas principais para exibição (resolvidas uma vez por conjunto de colunas)
+    colunas_exibir = list(colunas_amostra_cred(tuple(df_c.columns), cpf_col_cred))
+    
+    # Exibe valores vazios em branco nas colunas de texto para melhor visualização
+    # (o preenchimento roda nos kernels do Arrow; o índice da amostra não é serializado)
+    df_c_display = df_c[colunas_exibir].head(LIMITE_AMOSTRA)
+    st.dataframe(amostra_para_arrow(df_c_display), use_container_width=True)
+
+
 # ==============================
 # App principal
 # ==============================
@@ -354,6 +1104,7 @@ def main():
 
     # Carrega dados
     bilhetes, cred_2025, cred_2024 = load_data()
+    opcoes = opcoes_filtros()
 
     # Aba de navegação
     tab_bilhetagem, tab_clusters, tab_credenciamento = st.tabs(["🎟 Bilhetagem", "🎯 Análises de Cluster", "👷 Credenciamento 2025"])
@@ -364,33 +1115,15 @@ def main():
     with tab_bilhetagem:
         st.subheader("🎟 Análises de Bilhetagem")
 
-        # Adiciona coluna de dia da semana
-        if "TDL Event Date" in bilhetes.columns:
-            bilhetes["dia_semana"] = bilhetes["TDL Event Date"].dt.day_name()
-            
-            # Traduz os dias da semana
-            mapa_dia_bilhetagem = {
-                "Monday": "Segunda",
-                "Tuesday": "Terça",
-                "Wednesday": "Quarta",
-                "Thursday": "Quinta",
-                "Friday": "Sexta",
-                "Saturday": "Sábado",
-                "Sunday": "Domingo",
-            }
-            bilhetes["dia_semana_label"] = bilhetes["dia_semana"].map(mapa_dia_bilhetagem)
-
         # Filtros - Linha 1
         col1, col2, col3 = st.columns(3)
 
         # Evento
-        eventos = sorted(bilhetes["TDL Event"].dropna().unique())
-        evento_sel = col1.multiselect("Evento", eventos)
+        evento_sel = col1.multiselect("Evento", opcoes["eventos"])
 
         # Período
-        if bilhetes["TDL Event Date"].notna().any():
-            data_min = bilhetes["TDL Event Date"].min()
-            data_max = bilhetes["TDL Event Date"].max()
+        if opcoes["periodo"] is not None:
+            data_min, data_max = opcoes["periodo"]
             periodo = col2.date_input(
                 "Período do evento",
                 value=(data_min, data_max),
@@ -401,10 +1134,8 @@ def main():
             periodo = None
 
         # Dia da Semana
-        if "dia_semana_label" in bilhetes.columns:
-            dias_semana = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
-            dias_disponiveis = [d for d in dias_semana if d in bilhetes["dia_semana_label"].unique()]
-            dia_semana_sel = col3.multiselect("Dia da Semana", dias_disponiveis)
+        if opcoes["dias_semana"] is not None:
+            dia_semana_sel = col3.multiselect("Dia da Semana", opcoes["dias_semana"])
         else:
             dia_semana_sel = []
 
@@ -412,59 +1143,45 @@ def main():
         col4, col5, col6 = st.columns(3)
 
         # Região Administrativa
-        ras = sorted(bilhetes["RA"].dropna().unique())
-        ra_sel = col6.multiselect("Região Administrativa", ras)
+        ra_sel = col6.multiselect("Região Administrativa", opcoes["ras"])
         
         # País
-        pais_col = "TDL Customer Country"
-        if pais_col in bilhetes.columns:
-            paises = sorted(bilhetes[pais_col].dropna().unique())
-            pais_sel = col4.multiselect("País", paises)
+        if opcoes["paises"] is not None:
+            pais_sel = col4.multiselect("País", opcoes["paises"])
         else:
             pais_sel = []
 
         # Estado
-        tipo_ingresso_col = "TDL Price Category"
-        if tipo_ingresso_col in bilhetes.columns:
-            tipo_ingressos = sorted(bilhetes[tipo_ingresso_col].dropna().unique())
-            tipo_ingresso_sel = col5.multiselect("Tipo de Ingresso", tipo_ingressos)
+        if opcoes["tipos_ingresso"] is not None:
+            tipo_ingresso_sel = col5.multiselect("Tipo de Ingresso", opcoes["tipos_ingresso"])
         else:
             tipo_ingresso_sel = []
 
-        # Aplica filtros
-        df_b = bilhetes.copy()
-
-        if evento_sel:
-            df_b = df_b[df_b["TDL Event"].isin(evento_sel)]
-
-        if periodo is not None and isinstance(periodo, (list, tuple)) and len(periodo) == 2:
-            ini, fim = periodo
-            df_b = df_b[
-                (df_b["TDL Event Date"] >= pd.to_datetime(ini)) &
-                (df_b["TDL Event Date"] <= pd.to_datetime(fim))
-            ]
-
-        if pais_sel and pais_col in df_b.columns:
-            df_b = df_b[df_b[pais_col].isin(pais_sel)]
-
-        if tipo_ingresso_sel and tipo_ingresso_col in df_b.columns:
-            df_b = df_b[df_b[tipo_ingresso_col].isin(tipo_ingresso_sel)]
-
-        if ra_sel:
-            df_b = df_b[df_b["RA"].isin(ra_sel)]
-
-        if dia_semana_sel and "dia_semana_label" in df_b.columns:
-            df_b = df_b[df_b["dia_semana_label"].isin(dia_semana_sel)]
+        # Aplica filtros (resultado em cache por combinação de seleções)
+        filtros_bilhetes = (
+            tuple(evento_sel),
+            periodo,
+            tuple(pais_sel),
+            tuple(tipo_ingresso_sel),
+            tuple(ra_sel),
+            tuple(dia_semana_sel),
+        )
+        df_b = filtrar_bilhetes(*filtros_bilhetes)
 
         st.markdown("#### Visão geral")
         col_a, col_b, col_c = st.columns(3)
 
-        total_ingressos = df_b["TDL Sum Tickets (B+S-A)"].sum()
-        total_receita = df_b["TDL Sum Ticket Net Price (B+S-A)"].sum()
-        total_clientes = df_b["TDL Customer CPF"].nunique()
+        # Soma ingressos e receita em uma única passada
+        totais = df_b[["TDL Sum Tickets (B+S-A)", "TDL Sum Ticket Net Price (B+S-A)"]].sum()
+        total_ingressos = totais["TDL Sum Tickets (B+S-A)"]
+        total_receita = totais["TDL Sum Ticket Net Price (B+S-A)"]
+        # CPFs distintos pelos códigos da categórica, sem hash de strings
+        codigos_cpf = df_b["TDL Customer CPF"].cat.codes.to_numpy()
+        n_cpfs = len(df_b["TDL Customer CPF"].cat.categories)
+        total_clientes = np.count_nonzero(np.bincount(codigos_cpf[codigos_cpf >= 0], minlength=n_cpfs))
 
         col_a.metric("Total ingressos", int(total_ingressos))
-        col_b.metric("Receita líquida (R$)", f"{total_receita:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+        col_b.metric("Receita líquida (R$)", formatar_br(total_receita))
         col_c.metric("Clientes únicos", int(total_clientes))
 
         # Novas métricas
@@ -476,15 +1193,22 @@ def main():
         
         # Calcula clientes recorrentes (que foram a mais de 1 evento)
         if "TDL Event" in df_b.columns:
-            clientes_recorrentes = df_b.groupby("TDL Customer CPF")["TDL Event"].nunique()
-            qtd_recorrentes = (clientes_recorrentes > 1).sum()
+            # Pares únicos (CPF, evento) codificados como inteiros e contados por CPF
+            codigos_evento = df_b["TDL Event"].cat.codes.to_numpy()
+            n_eventos = len(df_b["TDL Event"].cat.categories)
+            validos = (codigos_cpf >= 0) & (codigos_evento >= 0)
+            pares_cpf_evento = np.unique(
+                codigos_cpf[validos].astype(np.int64) * n_eventos + codigos_evento[validos]
+            )
+            eventos_por_cpf = np.bincount(pares_cpf_evento // n_eventos, minlength=n_cpfs)
+            qtd_recorrentes = int(np.count_nonzero(eventos_por_cpf > 1))
             perc_recorrentes = (qtd_recorrentes / total_clientes * 100) if total_clientes > 0 else 0
         else:
             qtd_recorrentes = 0
             perc_recorrentes = 0
         
         col_d.metric("Média de ingressos por CPF", f"{media_ingressos_por_cpf:.2f}")
-        col_e.metric("Ticket médio (R$)", f"{ticket_medio:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+        col_e.metric("Ticket médio (R$)", formatar_br(ticket_medio))
         col_f.metric("Clientes recorrentes", f"{qtd_recorrentes} ({perc_recorrentes:.1f}%)")
         
         # Métricas de Ingresso Solidário
@@ -504,7 +1228,7 @@ def main():
             perc_solidarios = 0
         
         col_solid_a.metric("Ingressos Solidários", f"{int(qtd_solidarios)} ({perc_solidarios:.1f}%)")
-        col_solid_b.metric("Montante para Ações Sociais (R$)", f"{montante_social:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+        col_solid_b.metric("Montante para Ações Sociais (R$)", formatar_br(montante_social))
         col_solid_c.metric("Valor por Ingresso", "R$ 10,00")
         
         # Botão de download das métricas
@@ -536,10 +1260,9 @@ def main():
             ]
         })
         
-        csv_metricas = metricas_resumo.to_csv(index=False, encoding='utf-8-sig')
         st.download_button(
             label="📥 Download Métricas Gerais (CSV)",
-            data=csv_metricas,
+            data=csv_sob_demanda(metricas_resumo),
             file_name="metricas_bilhetagem.csv",
             mime="text/csv",
             use_container_width=True
@@ -579,14 +1302,14 @@ def main():
         grafico_vendas_ao_longo_do_tempo(df_b, escala)
 
         st.markdown("#### Top Regiões Administrativas (Ingressos)")
+        por_ra = None
         if not df_b.empty:
             por_ra = (
-                df_b.groupby("RA")["TDL Sum Tickets (B+S-A)"]
+                df_b.groupby("RA", observed=True)["TDL Sum Tickets (B+S-A)"]
                 .sum()
                 .reset_index()
                 .sort_values("TDL Sum Tickets (B+S-A)", ascending=False)
             )
-            por_ra = por_ra[por_ra["RA"].notna()]
             # Calcula percentuais
             total_ra = por_ra["TDL Sum Tickets (B+S-A)"].sum()
             por_ra["Percentual"] = (por_ra["TDL Sum Tickets (B+S-A)"] / total_ra * 100).round(1)
@@ -602,7 +1325,7 @@ def main():
                 title="Ingressos por Região Administrativa",
                 color="TDL Sum Tickets (B+S-A)",
                 color_continuous_scale="Blues",
-                text=por_ra["Percentual"].apply(lambda x: f"{x}%")
+                text=por_ra["Percentual"].astype(str) + "%"
             )
             fonts = get_font_sizes(escala)
             fig_ra.update_traces(textposition='outside', textfont_size=fonts['annotation'])
@@ -617,10 +1340,10 @@ def main():
             )
             st.plotly_chart(fig_ra, use_container_width=True, config=get_plotly_config(escala))
         
-        with st.expander("📊 Ver dados da tabela"):
-            por_ra_display = por_ra[["RA", "TDL Sum Tickets (B+S-A)", "Percentual"]].copy()
-            por_ra_display.columns = ["Região Administrativa", "Ingressos", "Percentual (%)"]
-            st.dataframe(por_ra_display, hide_index=True, use_container_width=True)
+            with st.expander("📊 Ver dados da tabela"):
+                por_ra_display = por_ra[["RA", "TDL Sum Tickets (B+S-A)", "Percentual"]].copy()
+                por_ra_display.columns = ["Região Administrativa", "Ingressos", "Percentual (%)"]
+                st.dataframe(por_ra_display, hide_index=True, use_container_width=True)
 
         st.markdown("---")
         st.markdown("### 📍 Análises Geográficas")
@@ -638,7 +1361,7 @@ def main():
         mapa_estado_rj(df_b, carregar_geojson_municipios_rj, escala)
 
         # Mapa das RAs da capital (função modular)
-        mapa_ras_capital(df_b, carregar_geojson_ras, escala)
+        mapa_ras_capital(df_b, carregar_geojson_ras, escala, por_ra=por_ra)
 
         # Gráfico de bairros por tipo de ingresso (função modular)
         grafico_bairros_por_tipo_ingresso(df_b, escala)
@@ -646,18 +1369,16 @@ def main():
         # Top 10 Bairros
         st.markdown("#### Top 10 Bairros por Total de Ingressos")
         if "bairro_google_norm" in df_b.columns:
+            # Seleção parcial dos 10 maiores, sem ordenar todos os bairros
             top_bairros = (
-                df_b[df_b["bairro_google_norm"].notna()]
-                .groupby("bairro_google_norm")["TDL Sum Tickets (B+S-A)"]
+                df_b.groupby("bairro_google_norm")["TDL Sum Tickets (B+S-A)"]
                 .sum()
+                .nlargest(10)
                 .reset_index()
-                .sort_values("TDL Sum Tickets (B+S-A)", ascending=False)
-                .head(10)
             )
             
-            # Calcula percentuais em relação ao total geral
-            total_geral_ingressos = df_b["TDL Sum Tickets (B+S-A)"].sum()
-            top_bairros["Percentual"] = (top_bairros["TDL Sum Tickets (B+S-A)"] / total_geral_ingressos * 100).round(1)
+            # Calcula percentuais em relação ao total geral (já somado nas métricas)
+            top_bairros["Percentual"] = (top_bairros["TDL Sum Tickets (B+S-A)"] / total_ingressos * 100).round(1)
             
             # Layout com gráfico e tabela lado a lado
             col_grafico, col_tabela = st.columns([2, 1])
@@ -672,14 +1393,14 @@ def main():
                         "TDL Sum Tickets (B+S-A)": "Total de Ingressos"
                     },
                     title="Top 10 Bairros",
-                    text=top_bairros["Percentual"].apply(lambda x: f"{x}%"),
+                    text=top_bairros["Percentual"].astype(str) + "%",
                     color="TDL Sum Tickets (B+S-A)",
-                    color_continuous_scale="Blues"
+                    color_continuous_scale="Blues",
+                    category_orders={"bairro_google_norm": top_bairros["bairro_google_norm"].tolist()}
                 )
                 fonts = get_font_sizes(escala)
                 fig_top_bairros.update_traces(textposition='outside', textfont_size=fonts['annotation'])
                 fig_top_bairros.update_layout(
-                    xaxis={'categoryorder':'total descending'},
                     height=500,
                     showlegend=False,
                     title_font_size=fonts['title'],
@@ -700,10 +1421,9 @@ def main():
                 st.dataframe(top_bairros_display, use_container_width=True, height=500)
             
             # Botão de download
-            csv_top_bairros = top_bairros_display.to_csv(index=True, encoding='utf-8-sig')
             st.download_button(
                 label="📥 Download Top 10 Bairros (CSV)",
-                data=csv_top_bairros,
+                data=csv_sob_demanda(top_bairros_display, index=True),
                 file_name="top_10_bairros.csv",
                 mime="text/csv",
                 use_container_width=True
@@ -714,7 +1434,8 @@ def main():
         # Tabela
         st.markdown("---")
         st.markdown("#### Amostra dos dados de bilhetagem")
-        st.dataframe(df_b)
+        mostrar_todas = st.toggle("Mostrar todas as linhas", key="amostra_bilhetes_completa")
+        st.dataframe(df_b if mostrar_todas else df_b.head(LIMITE_AMOSTRA))
 
     # ==============================
     # ABA 2 – ANÁLISES DE CLUSTER
@@ -723,30 +1444,8 @@ def main():
         st.subheader("🎯 Análises de Cluster")
         st.markdown("Segmentação avançada de clientes e regiões geográficas")
         
-        # Aplica os mesmos filtros da aba de bilhetagem
-        df_cluster = bilhetes.copy()
-        
-        if evento_sel:
-            df_cluster = df_cluster[df_cluster["TDL Event"].isin(evento_sel)]
-
-        if periodo is not None and isinstance(periodo, (list, tuple)) and len(periodo) == 2:
-            ini, fim = periodo
-            df_cluster = df_cluster[
-                (df_cluster["TDL Event Date"] >= pd.to_datetime(ini)) &
-                (df_cluster["TDL Event Date"] <= pd.to_datetime(fim))
-            ]
-
-        if pais_sel and pais_col in df_cluster.columns:
-            df_cluster = df_cluster[df_cluster[pais_col].isin(pais_sel)]
-
-        if tipo_ingresso_sel and tipo_ingresso_col in df_cluster.columns:
-            df_cluster = df_cluster[df_cluster[tipo_ingresso_col].isin(tipo_ingresso_sel)]
-
-        if ra_sel:
-            df_cluster = df_cluster[df_cluster["RA"].isin(ra_sel)]
-
-        if dia_semana_sel and "dia_semana_label" in df_cluster.columns:
-            df_cluster = df_cluster[df_cluster["dia_semana_label"].isin(dia_semana_sel)]
+        # Aplica os mesmos filtros da aba de bilhetagem (mesma entrada de cache)
+        df_cluster = filtrar_bilhetes(*filtros_bilhetes)
         
         # Análise de Clusters de Clientes
         analise_clusters_clientes(df_cluster, escala)
@@ -759,564 +1458,7 @@ def main():
     # ABA 3 – CREDENCIAMENTO 2025
     # ==============================
     with tab_credenciamento:
-        st.subheader("👷 Análises de Credenciamento 2025")
-
-        cred = cred_2025.copy()
-
-        # Cria coluna com dia da semana
-        if "DATA" in cred.columns:
-            cred["dia_semana"] = cred["DATA"].dt.day_name()
-
-            # Traduz e ordena
-            mapa_dia = {
-                "Wednesday": "Quarta",
-                "Thursday": "Quinta",
-                "Friday": "Sexta",
-                "Saturday": "Sábado",
-                "Sunday": "Domingo",
-                "Monday": "Segunda",
-                "Tuesday": "Terça",
-            }
-            cred["dia_label"] = cred["dia_semana"].map(mapa_dia)
-
-        # Filtros - Linha 1
-        col1, col2, col3 = st.columns(3)
-
-        # Etapa
-        if "ETAPA" in cred.columns:
-            etapas = sorted(cred["ETAPA"].dropna().unique())
-            etapa_sel = col1.multiselect("Etapa", etapas)
-        else:
-            etapa_sel = []
-
-        # Categoria
-        if "CATEGORIA" in cred.columns:
-            categorias = sorted(cred["CATEGORIA"].dropna().unique())
-            cat_sel = col2.multiselect("Categoria", categorias)
-        else:
-            cat_sel = []
-
-        # Empresa
-        if "EMPRESA" in cred.columns:
-            empresas = sorted(cred["EMPRESA"].dropna().unique())
-            emp_sel = col3.multiselect("Empresa", empresas)
-        else:
-            emp_sel = []
-
-        # Filtros - Linha 2
-        col4, col5, col6 = st.columns(3)
-
-        # Evento
-        if "EVENTO" in cred.columns:
-            eventos_cred = sorted([e for e in cred["EVENTO"].dropna().unique() if e != 'nan' and e != 'None'])
-            evento_cred_sel = col4.multiselect("Evento", eventos_cred, key="evento_cred")
-        else:
-            evento_cred_sel = []
-
-        # Origem (2025 ou Desmontagem 2024)
-        if "ORIGEM" in cred.columns:
-            origens = sorted(cred["ORIGEM"].dropna().unique())
-            origem_sel = col5.multiselect("Ano/Evento", origens)
-        else:
-            origem_sel = []
-
-        # Dia da Semana
-        if "dia_label" in cred.columns:
-            dias_semana = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
-            dias_disponiveis = [d for d in dias_semana if d in cred["dia_label"].unique()]
-            dia_semana_cred_sel = col6.multiselect("Dia da Semana", dias_disponiveis)
-        else:
-            dia_semana_cred_sel = []
-
-        # Filtros - Linha 3
-        col7, col8, col9 = st.columns(3)
-
-        # Período de data
-        if "DATA" in cred.columns and cred["DATA"].notna().any():
-            data_min_cred = cred["DATA"].min()
-            data_max_cred = cred["DATA"].max()
-            periodo_cred = col7.date_input(
-                "Período de credenciamento",
-                value=(data_min_cred, data_max_cred),
-                min_value=data_min_cred,
-                max_value=data_max_cred,
-                key="periodo_cred"
-            )
-        else:
-            periodo_cred = None
-
-        # Aplica filtros
-        df_c = cred.copy()
-        
-        # Agrupa PATROCINADOR e PATROCINADOR MM como STAFF
-        if "CATEGORIA" in df_c.columns:
-            df_c.loc[df_c["CATEGORIA"].isin(["PATROCINADOR", "PATROCINADOR MM"]), "CATEGORIA"] = "STAFF"
-
-        if etapa_sel and "ETAPA" in df_c.columns:
-            df_c = df_c[df_c["ETAPA"].isin(etapa_sel)]
-        if cat_sel and "CATEGORIA" in df_c.columns:
-            df_c = df_c[df_c["CATEGORIA"].isin(cat_sel)]
-        if emp_sel and "EMPRESA" in df_c.columns:
-            df_c = df_c[df_c["EMPRESA"].isin(emp_sel)]
-        if evento_cred_sel and "EVENTO" in df_c.columns:
-            df_c = df_c[df_c["EVENTO"].isin(evento_cred_sel)]
-        if origem_sel and "ORIGEM" in df_c.columns:
-            df_c = df_c[df_c["ORIGEM"].isin(origem_sel)]
-        if dia_semana_cred_sel and "dia_label" in df_c.columns:
-            df_c = df_c[df_c["dia_label"].isin(dia_semana_cred_sel)]
-        if periodo_cred is not None and isinstance(periodo_cred, (list, tuple)) and len(periodo_cred) == 2:
-            ini_cred, fim_cred = periodo_cred
-            df_c = df_c[
-                (df_c["DATA"] >= pd.to_datetime(ini_cred)) &
-                (df_c["DATA"] <= pd.to_datetime(fim_cred))
-            ]
-
-        # Métricas gerais
-        st.markdown("#### Visão geral")
-        col_a, col_b, col_c = st.columns(3)
-
-        # Total de credenciamentos (total de registros)
-        cpf_cols_cred = [col for col in df_c.columns if 'CPF' in col.upper()]
-        total_credenciamentos = len(df_c)
-        col_a.metric("Total de credenciamentos", int(total_credenciamentos))
-        
-        # Conta profissionais únicos por CPF
-        if cpf_cols_cred:
-            # Remove valores None/nan antes de contar
-            cpf_unicos = df_c[df_c[cpf_cols_cred[0]].notna() & (df_c[cpf_cols_cred[0]] != 'None')][cpf_cols_cred[0]].nunique()
-            col_b.metric("Profissionais únicos (CPF)", int(cpf_unicos))
-        elif "CATEGORIA" in df_c.columns:
-            total_categorias = df_c["CATEGORIA"].nunique()
-            col_b.metric("Categorias únicas", int(total_categorias))
-        
-        if "EMPRESA" in df_c.columns:
-            total_empresas = df_c["EMPRESA"].nunique()
-            col_c.metric("Empresas envolvidas", int(total_empresas))
-
-        # Gráfico de pizza: Contagem por Categoria
-        st.markdown("---")
-        st.markdown("#### 📊 Distribuição de Credenciamentos por Categoria")
-        
-        if "CATEGORIA" in df_c.columns:
-            # Filtra categorias válidas
-            df_c_cat_validas = df_c[
-                df_c["CATEGORIA"].notna() & 
-                (df_c["CATEGORIA"] != 'nan') & 
-                (df_c["CATEGORIA"] != 'None') &
-                (df_c["CATEGORIA"] != '')
-            ]
-            
-            if not df_c_cat_validas.empty:
-                # Conta credenciamentos por categoria
-                contagem_categoria = (
-                    df_c_cat_validas["CATEGORIA"]
-                    .value_counts()
-                    .reset_index()
-                )
-                contagem_categoria.columns = ["Categoria", "Quantidade"]
-                
-                # Calcula percentuais
-                total_cat_pizza = contagem_categoria["Quantidade"].sum()
-                contagem_categoria["Percentual"] = (contagem_categoria["Quantidade"] / total_cat_pizza * 100).round(2)
-                
-                # Layout com duas colunas: gráfico e tabela
-                col_grafico_cat, col_tabela_cat = st.columns([2, 1])
-                
-                with col_grafico_cat:
-                    # Cria gráfico de pizza
-                    fig_pizza_cat = px.pie(
-                        contagem_categoria,
-                        values="Quantidade",
-                        names="Categoria",
-                        title="Credenciamentos por Categoria",
-                        hole=0.4,
-                        color_discrete_sequence=px.colors.qualitative.Set3
-                    )
-                    
-                    fonts = get_font_sizes(escala)
-                    fig_pizza_cat.update_traces(
-                        textposition='auto',
-                        textinfo='percent+label',
-                        textfont_size=fonts['annotation']
-                    )
-                    fig_pizza_cat.update_layout(
-                        title_font_size=fonts['title'],
-                        legend_font_size=fonts['legend'],
-                        font_size=fonts['annotation'],
-                        height=500
-                    )
-                    
-                    st.plotly_chart(fig_pizza_cat, use_container_width=True, config=get_plotly_config(escala))
-                
-                with col_tabela_cat:
-                    # Exibe tabela com os dados
-                    contagem_categoria_display = contagem_categoria.copy()
-                    contagem_categoria_display["Percentual"] = contagem_categoria_display["Percentual"].apply(lambda x: f"{x}%")
-                    contagem_categoria_display.index = range(1, len(contagem_categoria_display) + 1)
-                    
-                    st.markdown("#### Detalhamento")
-                    st.dataframe(contagem_categoria_display, use_container_width=True, height=500)
-                
-                # Botão de download
-                csv_categoria = contagem_categoria_display.to_csv(index=True, encoding='utf-8-sig')
-                st.download_button(
-                    label="📥 Download Contagem por Categoria (CSV)",
-                    data=csv_categoria,
-                    file_name="credenciamento_por_categoria.csv",
-                    mime="text/csv",
-                    use_container_width=True
-                )
-            else:
-                st.info("Não há dados válidos de categoria disponíveis.")
-        else:
-            st.info("Coluna de categoria não disponível nos dados.")
-
-        st.markdown("---")
-        # Análise de profissionais por categoria e dia
-        if "CATEGORIA" in df_c.columns and "DATA" in df_c.columns:
-            st.markdown("#### Profissionais por Categoria e Dia")
-            
-            # Conta profissionais por categoria e data
-            cpf_col_cred = [col for col in df_c.columns if 'CPF' in col.upper()]
-            if cpf_col_cred:
-                # Filtra categorias válidas
-                df_c_cat_dia = df_c[
-                    df_c["CATEGORIA"].notna() & 
-                    (df_c["CATEGORIA"] != 'nan') & 
-                    (df_c["CATEGORIA"] != 'None')
-                ]
-                
-                prof_por_cat_dia = (
-                    df_c_cat_dia.groupby(["CATEGORIA", "DATA"])[cpf_col_cred[0]]
-                    .count()
-                    .reset_index()
-                )
-                prof_por_cat_dia.columns = ["Categoria", "Data", "Profissionais"]
-                prof_por_cat_dia["Data"] = pd.to_datetime(prof_por_cat_dia["Data"]).dt.strftime("%d/%m/%Y")
-                
-                if not prof_por_cat_dia.empty:
-                    # Cria tabela pivotada
-                    tabela_cat_dia = prof_por_cat_dia.pivot(
-                        index="Data",
-                        columns="Categoria",
-                        values="Profissionais"
-                    ).fillna(0).astype(int)
-                    
-                    # Adiciona total por linha
-                    tabela_cat_dia['Total'] = tabela_cat_dia.sum(axis=1)
-                    
-                    st.dataframe(tabela_cat_dia, use_container_width=True)
-                    
-                    with st.expander("📊 Ver gráfico"):
-                        # Gráfico de barras empilhadas
-                        prof_por_cat_dia_num = prof_por_cat_dia.copy()
-                        prof_por_cat_dia_num["Data"] = pd.to_datetime(prof_por_cat_dia_num["Data"], format="%d/%m/%Y")
-                        
-                        # Calcula total por dia para mostrar no topo
-                        total_por_dia_cat = prof_por_cat_dia_num.groupby("Data")["Profissionais"].sum().reset_index()
-                        total_por_dia_cat.columns = ["Data", "Total"]
-                        
-                        fig_cat_dia = px.bar(
-                            prof_por_cat_dia_num,
-                            x="Data",
-                            y="Profissionais",
-                            color="Categoria",
-                            barmode="stack",
-                            labels={
-                                "Data": "Data",
-                                "Profissionais": "Profissionais",
-                                "Categoria": "Categoria"
-                            },
-                            title="Profissionais por categoria e dia"
-                        )
-                        
-                        # Adiciona anotações com o total no topo de cada barra
-                        for _, row in total_por_dia_cat.iterrows():
-                            fig_cat_dia.add_annotation(
-                                x=row["Data"],
-                                y=row["Total"],
-                                text=f"{row['Total']:.0f}",
-                                showarrow=False,
-                                yshift=10,
-                                font=dict(size=12, color="white", family="Arial Black"),
-                                bgcolor="rgba(0,0,0,0.7)",
-                                bordercolor="white",
-                                borderwidth=1,
-                                borderpad=3
-                            )
-                        
-                        fonts = get_font_sizes(escala)
-                        fig_cat_dia.update_layout(
-                            height=500,
-                            title_font_size=fonts['title'],
-                            xaxis_title_font_size=fonts['axis'],
-                            yaxis_title_font_size=fonts['axis'],
-                            xaxis_tickfont_size=fonts['tick'],
-                            yaxis_tickfont_size=fonts['tick'],
-                            legend_font_size=fonts['legend']
-                        )
-                        st.plotly_chart(fig_cat_dia, use_container_width=True, config=get_plotly_config(escala))
-                else:
-                    st.info("Não há dados de categorias mapeadas para o período selecionado.")
-            
-            st.markdown("---")
-        
-        st.markdown("#### (a) Total de profissionais por categoria")
-        if not df_c.empty and "CATEGORIA" in df_c.columns and cpf_cols_cred:
-            # Filtra NaN antes de agrupar
-            df_c_cat = df_c[df_c["CATEGORIA"].notna() & (df_c["CATEGORIA"] != 'nan') & (df_c["CATEGORIA"] != 'None')]
-            total_cat = (
-                df_c_cat.groupby("CATEGORIA")[cpf_cols_cred[0]]
-                .count()
-                .reset_index()
-            )
-            total_cat.columns = ["CATEGORIA", "Total"]
-            total_cat = total_cat[total_cat["CATEGORIA"].notna()]
-            total_cat = total_cat.sort_values("Total", ascending=False)
-
-            # Calcula percentuais
-            total_geral = total_cat["Total"].sum()
-            total_cat["Percentual"] = (total_cat["Total"] / total_geral * 100).round(1)
-            
-            fig_total = px.bar(
-                total_cat,
-                x="CATEGORIA",
-                y="Total",
-                labels={
-                    "CATEGORIA": "Categoria",
-                    "Total": "Total de profissionais"
-                },
-                title="Total de profissionais por categoria",
-                text=total_cat["Percentual"].apply(lambda x: f"{x}%"),
-                color="Total",
-                color_continuous_scale="Blues"
-            )
-            
-            fonts = get_font_sizes(escala)
-            fig_total.update_traces(textposition='outside', textfont_size=fonts['annotation'])
-            fig_total.update_layout(
-                xaxis={'categoryorder':'total descending'},
-                height=500,
-                showlegend=False,
-                title_font_size=fonts['title'],
-                xaxis_title_font_size=fonts['axis'],
-                yaxis_title_font_size=fonts['axis'],
-                xaxis_tickfont_size=fonts['tick'],
-                yaxis_tickfont_size=fonts['tick']
-            )
-            
-            st.plotly_chart(fig_total, use_container_width=True, config=get_plotly_config(escala))
-            
-            with st.expander("📊 Ver dados da tabela"):
-                total_cat_display = total_cat.copy()
-                total_cat_display.columns = ["Categoria", "Total de Profissionais", "Percentual (%)"]
-                st.dataframe(total_cat_display, hide_index=True, use_container_width=True)
-
-        st.markdown("#### Número de Fornecedores por Categoria")
-        if not df_c.empty and "CATEGORIA" in df_c.columns and "EMPRESA" in df_c.columns:
-            # Filtra NaN antes de agrupar
-            df_c_forn = df_c[df_c["CATEGORIA"].notna() & (df_c["CATEGORIA"] != 'nan') & (df_c["CATEGORIA"] != 'None') & 
-                             df_c["EMPRESA"].notna() & (df_c["EMPRESA"] != 'nan') & (df_c["EMPRESA"] != 'None')]
-            # Conta fornecedores únicos por categoria
-            fornecedores_por_cat = (
-                df_c_forn.groupby("CATEGORIA")["EMPRESA"]
-                .nunique()
-                .reset_index()
-                .sort_values("EMPRESA", ascending=False)
-            )
-            fornecedores_por_cat.columns = ["Categoria", "Fornecedores"]
-            fornecedores_por_cat = fornecedores_por_cat[fornecedores_por_cat["Categoria"].notna()]
-            
-            # Calcula percentuais
-            total_fornecedores_graf = fornecedores_por_cat["Fornecedores"].sum()
-            fornecedores_por_cat["Percentual"] = (fornecedores_por_cat["Fornecedores"] / total_fornecedores_graf * 100).round(1)
-            
-            fig_fornecedores = px.bar(
-                fornecedores_por_cat,
-                x="Categoria",
-                y="Fornecedores",
-                labels={
-                    "Categoria": "Categoria",
-                    "Fornecedores": "Número de Fornecedores"
-                },
-                title="Fornecedores únicos por categoria",
-                text=fornecedores_por_cat["Percentual"].apply(lambda x: f"{x}%"),
-                color="Fornecedores",
-                color_continuous_scale="Blues"
-            )
-            
-            fonts = get_font_sizes(escala)
-            fig_fornecedores.update_traces(textposition='outside', textfont_size=fonts['annotation'])
-            fig_fornecedores.update_layout(
-                xaxis={'categoryorder':'total descending'},
-                height=500,
-                showlegend=False,
-                title_font_size=fonts['title'],
-                xaxis_title_font_size=fonts['axis'],
-                yaxis_title_font_size=fonts['axis'],
-                xaxis_tickfont_size=fonts['tick'],
-                yaxis_tickfont_size=fonts['tick']
-            )
-            
-            st.plotly_chart(fig_fornecedores, use_container_width=True, config=get_plotly_config(escala))
-            
-            with st.expander("📊 Ver dados da tabela"):
-                st.dataframe(fornecedores_por_cat, hide_index=True, use_container_width=True)
-
-        st.markdown("#### (b) Total de profissionais por categoria em cada dia do evento")
-        if not df_c.empty and "dia_label" in df_c.columns and "CATEGORIA" in df_c.columns and cpf_cols_cred:
-            # Filtra apenas os dias do evento (qua a dom) e remove NaN
-            dias_evento = ["Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
-            df_c_evento = df_c[
-                df_c["dia_label"].isin(dias_evento) & 
-                df_c["CATEGORIA"].notna() & 
-                (df_c["CATEGORIA"] != 'nan') & 
-                (df_c["CATEGORIA"] != 'None')
-            ]
-            
-            if not df_c_evento.empty:
-                total_cat_dia = (
-                    df_c_evento.groupby(["dia_label", "CATEGORIA"])[cpf_cols_cred[0]]
-                    .count()
-                    .reset_index()
-                )
-                total_cat_dia.columns = ["dia_label", "CATEGORIA", "Total"]
-                total_cat_dia = total_cat_dia[total_cat_dia["dia_label"].notna() & total_cat_dia["CATEGORIA"].notna()]
-
-                # Ordena dias na sequência desejada
-                ordem_dias = ["Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
-                total_cat_dia["dia_label"] = pd.Categorical(
-                    total_cat_dia["dia_label"], categories=ordem_dias, ordered=True
-                )
-                total_cat_dia = total_cat_dia.sort_values("dia_label")
-
-                # Calcula total por dia
-                total_por_dia = total_cat_dia.groupby("dia_label")["Total"].sum().reset_index()
-                total_por_dia.columns = ["dia_label", "Total_Dia"]
-                
-                # Calcula percentual de cada dia em relação ao total geral
-                total_geral = total_por_dia["Total_Dia"].sum()
-                total_por_dia["Percentual_Dia"] = (total_por_dia["Total_Dia"] / total_geral * 100).round(1)
-                
-                fig_total = px.bar(
-                    total_cat_dia,
-                    x="dia_label",
-                    y="Total",
-                    color="CATEGORIA",
-                    barmode="stack",
-                    labels={
-                        "dia_label": "Dia da Semana",
-                        "Total": "Total de profissionais",
-                        "CATEGORIA": "Categoria"
-                    },
-                    title="Total de profissionais por categoria em cada dia do evento"
-                )
-                
-                # Adiciona anotações com percentual no topo de cada barra
-                for _, row in total_por_dia.iterrows():
-                    fig_total.add_annotation(
-                        x=row["dia_label"],
-                        y=row["Total_Dia"],
-                        text=f"{row['Percentual_Dia']:.1f}%<br>(n={row['Total_Dia']:.0f})",
-                        showarrow=False,
-                        yshift=15,
-                        font=dict(size=11, color="white", family="Arial")
-                    )
-                
-                fonts = get_font_sizes(escala)
-                fig_total.update_layout(
-                    height=500,
-                    yaxis_title="Percentual (%)",
-                    title_font_size=fonts['title'],
-                    xaxis_title_font_size=fonts['axis'],
-                    yaxis_title_font_size=fonts['axis'],
-                    xaxis_tickfont_size=fonts['tick'],
-                    yaxis_tickfont_size=fonts['tick'],
-                    legend_font_size=fonts['legend']
-                )
-                st.plotly_chart(fig_total, use_container_width=True, config=get_plotly_config(escala))
-                
-                with st.expander("📊 Ver dados da tabela"):
-                    # Cria tabela pivotada para melhor visualização
-                    tabela_total_dia = total_cat_dia.pivot(index="dia_label", columns="CATEGORIA", values="Total").fillna(0)
-                    tabela_total_dia = tabela_total_dia.astype(int)
-                    st.dataframe(tabela_total_dia, use_container_width=True)
-            else:
-                st.info("Não há dados para os dias do evento (quarta a domingo).")
-
-        st.markdown("#### Distribuição por dia da semana")
-        if not df_c.empty and "dia_label" in df_c.columns and cpf_cols_cred:
-            # Filtra NaN antes de agrupar
-            df_c_dia = df_c[df_c["dia_label"].notna() & (df_c["dia_label"] != 'nan') & (df_c["dia_label"] != 'None')]
-            profissionais_por_dia = (
-                df_c_dia.groupby("dia_label")[cpf_cols_cred[0]]
-                .count()
-                .reset_index()
-            )
-            profissionais_por_dia.columns = ["dia_label", "Total"]
-            profissionais_por_dia = profissionais_por_dia[profissionais_por_dia["dia_label"].notna()]
-            
-            # Ordena os dias
-            ordem_todos_dias = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
-            profissionais_por_dia["dia_label"] = pd.Categorical(
-                profissionais_por_dia["dia_label"], categories=ordem_todos_dias, ordered=True
-            )
-            profissionais_por_dia = profissionais_por_dia.sort_values("dia_label")
-            
-            # Calcula percentuais
-            total_dias = profissionais_por_dia["Total"].sum()
-            profissionais_por_dia["Percentual"] = (profissionais_por_dia["Total"] / total_dias * 100).round(1)
-            
-            fig_dia = px.bar(
-                profissionais_por_dia,
-                x="dia_label",
-                y="Total",
-                labels={
-                    "dia_label": "Dia da Semana",
-                    "Total": "Total de profissionais"
-                },
-                title="Total de profissionais por dia da semana",
-                text=profissionais_por_dia["Percentual"].apply(lambda x: f"{x}%")
-            )
-            fonts = get_font_sizes(escala)
-            fig_dia.update_traces(textposition='outside', textfont_size=fonts['annotation'])
-            fig_dia.update_layout(
-                title_font_size=fonts['title'],
-                xaxis_title_font_size=fonts['axis'],
-                yaxis_title_font_size=fonts['axis'],
-                xaxis_tickfont_size=fonts['tick'],
-                yaxis_tickfont_size=fonts['tick']
-            )
-            st.plotly_chart(fig_dia, use_container_width=True, config=get_plotly_config(escala))
-            
-            with st.expander("📊 Ver dados da tabela"):
-                profissionais_por_dia_display = profissionais_por_dia[["dia_label", "Total", "Percentual"]].copy()
-                profissionais_por_dia_display.columns = ["Dia da Semana", "Total de Profissionais", "Percentual (%)"]
-                st.dataframe(profissionais_por_dia_display, hide_index=True, use_container_width=True)
-
-        st.markdown("#### Amostra dos dados de credenciamento")
-        
-        # Seleciona as colunas principais para exibição
-        colunas_exibir = []
-        colunas_possiveis = ["DATA", "NOME", "CATEGORIA", "EMPRESA", "ETAPA", "EVENTO", "ORIGEM"]
-        
-        for col in colunas_possiveis:
-            if col in df_c.columns:
-                colunas_exibir.append(col)
-        
-        # Adiciona coluna CPF se existir
-        if cpf_cols_cred:
-            colunas_exibir.insert(1, cpf_cols_cred[0])
-        
-        # Remove valores 'nan', 'None' das colunas string para melhor visualização
-        df_c_display = df_c[colunas_exibir].copy()
-        for col in df_c_display.columns:
-            if df_c_display[col].dtype == 'object':
-                df_c_display[col] = df_c_display[col].replace(['nan', 'None'], '')
-        
-        st.dataframe(df_c_display, use_container_width=True)
+        render_credenciamento(cred_2025, opcoes, escala)
 
 if __name__ == "__main__":
     main()
-
-
@@ -1,15 +1,36 @@
+import os
+from functools import lru_cache
+from types import MappingProxyType
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.preprocessing import StandardScaler
 from sklearn.decomposition import PCA
+from joblib import Parallel, delayed
+from threadpoolctl import threadpool_limits
+from graficos.formatacao import formatar_br
+from graficos.exportacao import csv_sob_demanda, csv_arrow_sob_demanda
 
+# Limita as threads de BLAS/OpenMP para não disputar CPU com o servidor do Streamlit
+LIMITE_THREADS = min(4, os.cpu_count() or 1)
 
+# Acima deste número de linhas o cotovelo é estimado sobre uma amostra fixa
+LIMITE_AMOSTRA_COTOVELO = 20000
+
+# Abaixo deste número de linhas o K-means final roda em uma thread (BLAS/OpenMP)
+LIMITE_LINHAS_SEQUENCIAL = 2048
+
+# Colunas lidas pelas análises (o restante da base não é copiado)
+COLUNAS_CLIENTES = ("TDL Customer CPF", "TDL Event", "TDL Ticket Type", "TDL Sum Tickets (B+S-A)", "TDL Sum Ticket Net Price (B+S-A)")
+COLUNAS_REGIOES = ("TDL Sum Tickets (B+S-A)", "TDL Sum Ticket Net Price (B+S-A)", "TDL Customer CPF", "TDL Event")
+
+
+@lru_cache(maxsize=8)
 def get_plotly_config(escala=2):
-    """Retorna configuração otimizada para gráficos Plotly"""
+    """Retorna configuração otimizada para gráficos Plotly (compartilhada: não alterar)"""
     return {
         'toImageButtonOptions': {
             'format': 'png',
@@ -23,78 +44,194 @@ def get_plotly_config(escala=2):
     }
 
 
+@lru_cache(maxsize=8)
 def get_font_sizes(escala=2):
-    """Retorna tamanhos de fonte base aumentados proporcionalmente à escala"""
+    """Retorna tamanhos de fonte base aumentados proporcionalmente à escala (somente leitura)"""
     # Multiplica diretamente pela escala para fontes maiores na exportação
-    return {
+    return MappingProxyType({
         'title': int(20 * escala),
         'axis': int(16 * escala),
         'tick': int(14 * escala),
         'legend': int(14 * escala),
         'annotation': int(14 * escala)
-    }
+    })
 
 
+def nomear_clusters(clusters, condicoes, perfis, padrao):
+    """Rótulos "Cluster N: Perfil", com o primeiro perfil cuja condição for verdadeira"""
+    return "Cluster " + clusters.astype(str) + ": " + np.select(condicoes, perfis, default=padrao)
 
-def analise_clusters_clientes(df_b, escala=2):
+
+def somar_por_grupo(codigos, valores, n_grupos):
+    """Soma dos valores por código de grupo (nulos contam como zero, como no groupby)"""
+    soma = np.bincount(codigos, weights=valores.fillna(0).to_numpy(dtype=np.float64), minlength=n_grupos)
+    return soma.astype(np.int64) if pd.api.types.is_integer_dtype(valores) else soma
+
+
+def media_por_grupo(codigos, valores, n_grupos):
+    """Média dos valores por código de grupo, ignorando nulos (como no groupby)"""
+    valores = valores.to_numpy(dtype=np.float64)
+    validos = ~np.isnan(valores)
+    soma = np.bincount(codigos, weights=np.where(validos, valores, 0), minlength=n_grupos)
+    contagem = np.bincount(codigos, weights=validos, minlength=n_grupos)
+    return np.divide(soma, contagem, out=np.full(n_grupos, np.nan), where=contagem > 0)
+
+
+def contar_distintos_por_grupo(codigos, valores, n_grupos):
+    """Quantidade de valores distintos (não nulos) por código de grupo"""
+    codigos_valor, _ = pd.factorize(valores)
+    validos = codigos_valor >= 0
+    base = max(codigos_valor.max() + 1, 1)
+    pares = np.unique(codigos[validos].astype(np.int64) * base + codigos_valor[validos])
+    return np.bincount(pares // base, minlength=n_grupos)
+
+
+def agregar_regioes(df, campo, nome_coluna):
+    """Totais por região (ingressos, receita, clientes e eventos distintos) via códigos inteiros"""
+    codigos, regioes = pd.factorize(df[campo], sort=True)
+    n_regioes = len(regioes)
+    return pd.DataFrame({
+        nome_coluna: regioes,
+        "Total_Ingressos": somar_por_grupo(codigos, df["TDL Sum Tickets (B+S-A)"], n_regioes),
+        "Receita_Total": somar_por_grupo(codigos, df["TDL Sum Ticket Net Price (B+S-A)"], n_regioes),
+        "Clientes_Unicos": contar_distintos_por_grupo(codigos, df["TDL Customer CPF"], n_regioes),
+        "Eventos_Diferentes": contar_distintos_por_grupo(codigos, df["TDL Event"], n_regioes)
+    })
+
+
+def normalizar_features(df, colunas):
     """
-    Realiza análise de cluster dos clientes baseada em comportamento de compra,
-    valor de ingressos e tipos de ingresso.
+    Matriz float32 contígua (C) e normalizada com as colunas indicadas.
+    É a entrada de todos os K-means: metade dos bytes do float64 nas distâncias.
     """
-    st.markdown("### 🎯 Análise de Clusters de Clientes")
-    st.markdown("Segmentação de clientes baseada em comportamento de compra, valor gasto e preferências")
-    
-    if df_b.empty or "TDL Customer CPF" not in df_b.columns:
-        st.info("Não há dados disponíveis para análise de clusters.")
-        return
-    
-    # Filtra eventos excluídos da análise
+    # to_numpy de várias colunas sai em ordem Fortran; uma cópia contígua já em float32
+    X = np.ascontiguousarray(df[list(colunas)].to_numpy(dtype=np.float32))
+    with threadpool_limits(limits=LIMITE_THREADS):
+        return StandardScaler(copy=False).fit_transform(X)
+
+
+def inercia_mini_batch(X_scaled, k):
+    """Inércia de um MiniBatchKMeans com k clusters"""
+    # Lotes de até 1024 linhas (tabelas de cidades/bairros cabem em um único lote)
+    kmeans = MiniBatchKMeans(
+        n_clusters=k, random_state=42, batch_size=min(1024, len(X_scaled)), n_init="auto", max_iter=100
+    )
+    # Cada worker é um processo: o limite vale só para ele, sem disputar com outras sessões
+    with threadpool_limits(limits=1):
+        return kmeans.fit(X_scaled).inertia_
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def calcular_inercias(X_scaled, k_min, k_max):
+    """Inércias do método do cotovelo para K de k_min a k_max (calculadas uma vez por base)"""
+    # Mini-batch basta para o formato da curva; o K final usa o KMeans completo
+    # Em bases grandes a curva sai de uma amostra fixa, reescalada para o total de linhas
+    n_linhas = len(X_scaled)
+    fator = 1.0
+    if n_linhas > LIMITE_AMOSTRA_COTOVELO:
+        amostra = np.random.default_rng(42).choice(n_linhas, LIMITE_AMOSTRA_COTOVELO, replace=False)
+        X_scaled = X_scaled[np.sort(amostra)]
+        fator = n_linhas / LIMITE_AMOSTRA_COTOVELO
+    
+    # Os K são independentes: cada um roda em um processo do loky, com BLAS/OpenMP em 1 thread
+    # (em threads, os fits do sklearn trocariam o limite do BLAS do processo todo entre si)
+    inertias = Parallel(n_jobs=LIMITE_THREADS, backend="loky")(
+        delayed(inercia_mini_batch)(X_scaled, k) for k in range(k_min, k_max + 1)
+    )
+    return [inercia * fator for inercia in inertias]
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def ajustar_kmeans(X_scaled, n_clusters):
+    """Rótulos do K-means para o número de clusters escolhido (em cache por base e K)"""
+    # n_init="auto" = uma única inicialização k-means++ (já próxima da ótima; não precisa de 10 rodadas)
+    # Elkan: com poucas dimensões e K pequeno, a desigualdade triangular evita a maior parte das distâncias
+    kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init="auto", algorithm="elkan")
+    # Tabelas pequenas (bairros, cidades) não compensam acordar o pool de threads
+    threads = 1 if len(X_scaled) < LIMITE_LINHAS_SEQUENCIAL else LIMITE_THREADS
+    with threadpool_limits(limits=threads):
+        # Sem cópia quando a matriz já vem de normalizar_features
+        return kmeans.fit_predict(np.ascontiguousarray(X_scaled, dtype=np.float32))
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def preparar_features_clientes(df_b):
+    """
+    Monta as features por cliente (sem outliers) e a matriz normalizada para o K-means.
+    Fica em cache por base filtrada: mexer nos sliders não refaz o groupby nem a normalização.
+    """
+    # Prepara os dados: clientes com CPF, sem o evento excluído e só com as colunas usadas
+    mask_analise = df_b["TDL Customer CPF"].notna()
     if "TDL Event" in df_b.columns:
-        df_b = df_b[df_b["TDL Event"] != "O BAILE DA MÚSICA BRASILEIRA COM CORDAO DO BOITATA E CONVIDADOS"].copy()
+        mask_analise &= df_b["TDL Event"] != "O BAILE DA MÚSICA BRASILEIRA COM CORDAO DO BOITATA E CONVIDADOS"
+    df_analise = df_b.loc[mask_analise, [col for col in COLUNAS_CLIENTES if col in df_b.columns]].copy()
     
-    # Prepara os dados
-    df_analise = df_b[df_b["TDL Customer CPF"].notna()].copy()
+    # Chaves de agrupamento como categóricas (groupby e nunique sobre códigos inteiros)
+    for col in ("TDL Customer CPF", "TDL Event", "TDL Ticket Type"):
+        if col in df_analise.columns and df_analise[col].dtype != "category":
+            df_analise[col] = df_analise[col].astype("category")
     
     # Identifica ingressos solidários
     if "TDL Ticket Type" in df_analise.columns:
-        mask_solidario = df_analise["TDL Ticket Type"].str.upper().str.contains("SOLIDÁRIO", na=False)
+        # Testa o texto só uma vez por tipo de ingresso (categoria) e não por linha
+        tipos_ingresso = df_analise["TDL Ticket Type"]
+        tipos_solidarios = [
+            tipo for tipo in tipos_ingresso.cat.categories
+            if isinstance(tipo, str) and "SOLIDÁRIO" in tipo.upper()
+        ]
+        mask_solidario = tipos_ingresso.isin(tipos_solidarios)
     else:
         mask_solidario = pd.Series([False] * len(df_analise), index=df_analise.index)
     
-    # Agrupa por cliente
-    features_clientes = df_analise.groupby("TDL Customer CPF").agg({
-        "TDL Sum Tickets (B+S-A)": "sum",  # Total de ingressos comprados
-        "TDL Sum Ticket Net Price (B+S-A)": ["sum", "mean"],  # Valor total e médio gasto
-        "TDL Event": "nunique"  # Número de eventos diferentes
-    }).reset_index()
+    # Ingressos solidários por linha (zero nas demais), somados no mesmo groupby
+    df_analise["Ingressos_Solidarios"] = df_analise["TDL Sum Tickets (B+S-A)"].where(mask_solidario, 0)
     
-    # Renomeia colunas
-    features_clientes.columns = ["CPF", "Total_Ingressos", "Valor_Total", "Ticket_Medio", "Num_Eventos"]
-    
-    # Adiciona informação se comprou ingresso solidário
-    if "TDL Ticket Type" in df_analise.columns:
-        solidarios = df_analise[mask_solidario].groupby("TDL Customer CPF")["TDL Sum Tickets (B+S-A)"].sum().reset_index(name="Ingressos_Solidarios")
-        features_clientes = features_clientes.merge(solidarios, left_on="CPF", right_on="TDL Customer CPF", how="left")
-        features_clientes["Ingressos_Solidarios"] = features_clientes["Ingressos_Solidarios"].fillna(0)
-        if "TDL Customer CPF" in features_clientes.columns:
-            features_clientes = features_clientes.drop("TDL Customer CPF", axis=1)
-    else:
-        features_clientes["Ingressos_Solidarios"] = 0
+    # Agrupa por cliente em uma única passada
+    features_clientes = df_analise.groupby("TDL Customer CPF", observed=True).agg(
+        Total_Ingressos=("TDL Sum Tickets (B+S-A)", "sum"),  # Total de ingressos comprados
+        Valor_Total=("TDL Sum Ticket Net Price (B+S-A)", "sum"),  # Valor total gasto
+        Ticket_Medio=("TDL Sum Ticket Net Price (B+S-A)", "mean"),  # Valor médio gasto
+        Num_Eventos=("TDL Event", "nunique"),  # Número de eventos diferentes
+        Ingressos_Solidarios=("Ingressos_Solidarios", "sum")
+    ).rename_axis("CPF").reset_index()
     
     # Remove outliers extremos (top 1% em valor total)
-    threshold_valor = features_clientes["Valor_Total"].quantile(0.99)
+    # (np.quantile seleciona por partição em vez de ordenar a coluna inteira)
+    threshold_valor = np.quantile(features_clientes["Valor_Total"].to_numpy(), 0.99)
     features_clientes_filtered = features_clientes[features_clientes["Valor_Total"] <= threshold_valor].copy()
     
     if len(features_clientes_filtered) < 10:
-        st.warning("Dados insuficientes para análise de clusters.")
+        return features_clientes_filtered, None
+    
+    # Normaliza os dados uma única vez (a mesma matriz alimenta cotovelo, K-means final e PCA)
+    X_scaled = normalizar_features(
+        features_clientes_filtered,
+        ("Total_Ingressos", "Valor_Total", "Ticket_Medio", "Num_Eventos", "Ingressos_Solidarios")
+    )
+    
+    return features_clientes_filtered, X_scaled
+
+
+def analise_clusters_clientes(df_b, escala=2):
+    """
+    Realiza análise de cluster dos clientes baseada em comportamento de compra,
+    valor de ingressos e tipos de ingresso.
+    """
+    st.markdown("### 🎯 Análise de Clusters de Clientes")
+    st.markdown("Segmentação de clientes baseada em comportamento de compra, valor gasto e preferências")
+    
+    if df_b.empty or "TDL Customer CPF" not in df_b.columns:
+        st.info("Não há dados disponíveis para análise de clusters.")
         return
     
-    # Seleciona features para clustering
-    X = features_clientes_filtered[["Total_Ingressos", "Valor_Total", "Ticket_Medio", "Num_Eventos", "Ingressos_Solidarios"]].copy()
+    # Só as colunas usadas entram no cache (o st.cache_data faz hash de toda a entrada)
+    features_clientes_filtered, X_scaled = preparar_features_clientes(
+        df_b[[col for col in COLUNAS_CLIENTES if col in df_b.columns]]
+    )
     
-    # Normaliza os dados
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    if X_scaled is None:
+        st.warning("Dados insuficientes para análise de clusters.")
+        return
     
     # Determina número ótimo de clusters usando método do cotovelo
     st.markdown("#### 📈 Determinação do Número Ótimo de Clusters")
@@ -102,13 +239,8 @@ def analise_clusters_clientes(df_b, escala=2):
     col_cotovelo, col_info = st.columns([2, 1])
     
     with col_cotovelo:
-        inertias = []
         K_range = range(2, min(11, len(features_clientes_filtered) // 10))
-        
-        for k in K_range:
-            kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-            kmeans.fit(X_scaled)
-            inertias.append(kmeans.inertia_)
+        inertias = calcular_inercias(X_scaled, K_range.start, K_range.stop - 1)
         
         fig_cotovelo = go.Figure()
         fig_cotovelo.add_trace(go.Scatter(
@@ -139,6 +271,24 @@ def analise_clusters_clientes(df_b, escala=2):
         st.write("O **método do cotovelo** ajuda a identificar o número ideal de clusters.")
         st.write("Procure pelo 'cotovelo' no gráfico - o ponto onde a taxa de redução da inércia diminui significativamente.")
     
+    # Aplica PCA para visualização 2D (não depende do número de clusters)
+    pca = PCA(n_components=2, svd_solver="randomized", random_state=42)
+    with threadpool_limits(limits=LIMITE_THREADS):
+        X_pca = pca.fit_transform(X_scaled)
+    features_clientes_filtered["PC1"] = X_pca[:, 0]
+    features_clientes_filtered["PC2"] = X_pca[:, 1]
+    
+    render_clusters_clientes(features_clientes_filtered, X_scaled, escala)
+
+
+@st.fragment
+def render_clusters_clientes(features_clientes_filtered, X_scaled, escala=2):
+    """
+    Renderiza o K-means final dos clientes como fragmento.
+    
+    Mudanças no slider reexecutam apenas este trecho, sem refazer a preparação
+    das features, o cotovelo e o PCA.
+    """
     # Permite ao usuário escolher o número de clusters
     n_clusters = st.slider(
         "Selecione o número de clusters:",
@@ -149,14 +299,7 @@ def analise_clusters_clientes(df_b, escala=2):
     )
     
     # Aplica K-means com o número escolhido
-    kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-    features_clientes_filtered["Cluster"] = kmeans.fit_predict(X_scaled)
-    
-    # Aplica PCA para visualização 2D
-    pca = PCA(n_components=2, random_state=42)
-    X_pca = pca.fit_transform(X_scaled)
-    features_clientes_filtered["PC1"] = X_pca[:, 0]
-    features_clientes_filtered["PC2"] = X_pca[:, 1]
+    features_clientes_filtered["Cluster"] = ajustar_kmeans(X_scaled, n_clusters)
     
     # Visualização dos clusters
     st.markdown("---")
@@ -220,45 +363,62 @@ def analise_clusters_clientes(df_b, escala=2):
     st.markdown("---")
     st.markdown("#### 📊 Características dos Clusters")
     
-    # Calcula estatísticas por cluster
-    cluster_stats = features_clientes_filtered.groupby("Cluster").agg({
-        "CPF": "count",
-        "Total_Ingressos": ["mean", "median", "sum"],
-        "Valor_Total": ["mean", "median", "sum"],
-        "Ticket_Medio": ["mean", "median"],
-        "Num_Eventos": ["mean", "median"],
-        "Ingressos_Solidarios": ["sum", "mean"]
+    # Calcula estatísticas por cluster direto sobre os rótulos 0..k-1 (bincount por coluna)
+    # (dimensionado por n_clusters: o K-means pode deixar clusters vazios)
+    rotulos = features_clientes_filtered["Cluster"].to_numpy()
+    n_rotulos = n_clusters
+    
+    # Medianas: ordena os clientes por cluster uma única vez e corta nos limites de cada um
+    ordem = np.argsort(rotulos, kind="stable")
+    limites = np.searchsorted(rotulos[ordem], np.arange(1, n_rotulos))
+    
+    def mediana(col):
+        valores = features_clientes_filtered[col].to_numpy(dtype=np.float64)[ordem]
+        return [np.nanmedian(segmento) if len(segmento) else np.nan for segmento in np.split(valores, limites)]
+    
+    def media(col):
+        return media_por_grupo(rotulos, features_clientes_filtered[col], n_rotulos)
+    
+    def soma(col):
+        return somar_por_grupo(rotulos, features_clientes_filtered[col], n_rotulos)
+    
+    cluster_stats = pd.DataFrame({
+        "Cluster": np.arange(n_rotulos),
+        "Quantidade_Clientes": np.bincount(rotulos, minlength=n_rotulos),
+        "Media_Ingressos": media("Total_Ingressos"),
+        "Mediana_Ingressos": mediana("Total_Ingressos"),
+        "Total_Ingressos_Cluster": soma("Total_Ingressos"),
+        "Media_Valor_Total": media("Valor_Total"),
+        "Mediana_Valor_Total": mediana("Valor_Total"),
+        "Total_Valor_Cluster": soma("Valor_Total"),
+        "Media_Ticket_Medio": media("Ticket_Medio"),
+        "Mediana_Ticket_Medio": mediana("Ticket_Medio"),
+        "Media_Num_Eventos": media("Num_Eventos"),
+        "Mediana_Num_Eventos": mediana("Num_Eventos"),
+        "Total_Solidarios": soma("Ingressos_Solidarios"),
+        "Media_Solidarios_por_Cliente": media("Ingressos_Solidarios")
     }).round(2)
     
-    # Renomeia colunas do MultiIndex
-    cluster_stats.columns = [
-        "Quantidade_Clientes",
-        "Media_Ingressos", "Mediana_Ingressos", "Total_Ingressos_Cluster",
-        "Media_Valor_Total", "Mediana_Valor_Total", "Total_Valor_Cluster",
-        "Media_Ticket_Medio", "Mediana_Ticket_Medio",
-        "Media_Num_Eventos", "Mediana_Num_Eventos",
-        "Total_Solidarios", "Media_Solidarios_por_Cliente"
-    ]
-    
-    cluster_stats = cluster_stats.reset_index()
+    # Clusters vazios não têm perfil: ficam fora dos nomes, cards e gráficos
+    cluster_stats = cluster_stats[cluster_stats["Quantidade_Clientes"] > 0].reset_index(drop=True)
     
     # Cria nomes descritivos para os clusters baseados nas características
-    def nomear_cluster(row):
-        if row["Media_Valor_Total"] > cluster_stats["Media_Valor_Total"].quantile(0.75):
-            if row["Media_Num_Eventos"] > 1.5:
-                return f"Cluster {row['Cluster']}: VIPs Recorrentes"
-            else:
-                return f"Cluster {row['Cluster']}: Alto Valor"
-        elif row["Media_Ingressos"] > cluster_stats["Media_Ingressos"].quantile(0.75):
-            return f"Cluster {row['Cluster']}: Compradores em Grupo"
-        elif row["Media_Solidarios_por_Cliente"] > 0.5:
-            return f"Cluster {row['Cluster']}: Solidários"
-        elif row["Media_Num_Eventos"] > cluster_stats["Media_Num_Eventos"].median():
-            return f"Cluster {row['Cluster']}: Fãs Frequentes"
-        else:
-            return f"Cluster {row['Cluster']}: Ocasionais"
-    
-    cluster_stats["Nome_Cluster"] = cluster_stats.apply(nomear_cluster, axis=1)
+    q75_valor, q75_ingressos = np.quantile(
+        cluster_stats[["Media_Valor_Total", "Media_Ingressos"]].to_numpy(), 0.75, axis=0
+    )
+    alto_valor = cluster_stats["Media_Valor_Total"] > q75_valor
+    cluster_stats["Nome_Cluster"] = nomear_clusters(
+        cluster_stats["Cluster"],
+        [
+            alto_valor & (cluster_stats["Media_Num_Eventos"] > 1.5),
+            alto_valor,
+            cluster_stats["Media_Ingressos"] > q75_ingressos,
+            cluster_stats["Media_Solidarios_por_Cliente"] > 0.5,
+            cluster_stats["Media_Num_Eventos"] > cluster_stats["Media_Num_Eventos"].median()
+        ],
+        ["VIPs Recorrentes", "Alto Valor", "Compradores em Grupo", "Solidários", "Fãs Frequentes"],
+        "Ocasionais"
+    )
     
     # Exibe cards com informações de cada cluster
     num_cols = min(n_clusters, 3)
@@ -271,7 +431,7 @@ def analise_clusters_clientes(df_b, escala=2):
                 st.markdown(f"### {cluster_info['Nome_Cluster']}")
                 st.metric("Clientes", f"{int(cluster_info['Quantidade_Clientes']):,}".replace(",", "."))
                 st.metric("Ingressos Médios", f"{cluster_info['Media_Ingressos']:.1f}")
-                st.metric("Ticket Médio", f"R$ {cluster_info['Media_Ticket_Medio']:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+                st.metric("Ticket Médio", f"R$ {formatar_br(cluster_info['Media_Ticket_Medio'])}")
                 st.metric("Eventos Médios", f"{cluster_info['Media_Num_Eventos']:.1f}")
                 
                 if cluster_info['Total_Solidarios'] > 0:
@@ -371,32 +531,23 @@ def analise_clusters_clientes(df_b, escala=2):
     
     fonts = get_font_sizes(escala)
     
-    # Normaliza as métricas para o gráfico radar (0-100)
-    metricas_radar = cluster_stats[["Nome_Cluster", "Media_Ingressos", "Media_Ticket_Medio", "Media_Num_Eventos"]].copy()
-    
-    for col in ["Media_Ingressos", "Media_Ticket_Medio", "Media_Num_Eventos"]:
-        max_val = metricas_radar[col].max()
-        if max_val > 0:
-            metricas_radar[f"{col}_norm"] = (metricas_radar[col] / max_val * 100).round(1)
-        else:
-            metricas_radar[f"{col}_norm"] = 0
+    # Normaliza as métricas para o gráfico radar (0-100) em uma única divisão por coluna
+    metricas_radar = cluster_stats[["Media_Ingressos", "Media_Ticket_Medio", "Media_Num_Eventos"]].to_numpy(dtype=np.float64)
+    maximos = metricas_radar.max(axis=0)
+    metricas_norm = (
+        np.divide(metricas_radar, maximos, out=np.zeros_like(metricas_radar), where=maximos > 0) * 100
+    ).round(1)
     
     fig_radar = go.Figure()
     
     categorias = ["Ingressos Médios", "Ticket Médio", "Eventos Médios"]
     
-    for _, row in metricas_radar.iterrows():
-        valores = [
-            row["Media_Ingressos_norm"],
-            row["Media_Ticket_Medio_norm"],
-            row["Media_Num_Eventos_norm"]
-        ]
-        
+    for nome_cluster, valores in zip(cluster_stats["Nome_Cluster"], metricas_norm):
         fig_radar.add_trace(go.Scatterpolar(
-            r=valores,
+            r=valores.tolist(),
             theta=categorias,
             fill='toself',
-            name=row["Nome_Cluster"]
+            name=nome_cluster
         ))
     
     fig_radar.update_layout(
@@ -417,11 +568,16 @@ def analise_clusters_clientes(df_b, escala=2):
     
     # Exporta dados dos clusters
     st.markdown("---")
-    features_clientes_filtered["Nome_Cluster"] = features_clientes_filtered["Cluster"].map(
-        dict(zip(cluster_stats["Cluster"], cluster_stats["Nome_Cluster"]))
+    # Rótulos do K-means são 0..k-1: o nome sai por indexação direta dos códigos
+    # (clusters vazios ficam com código -1, que nenhum cliente usa)
+    codigos_nome = np.full(n_rotulos, -1)
+    codigos_nome[cluster_stats["Cluster"].to_numpy()] = np.arange(len(cluster_stats))
+    features_clientes_filtered["Nome_Cluster"] = pd.Categorical.from_codes(
+        codigos_nome[rotulos],
+        categories=cluster_stats["Nome_Cluster"].to_numpy()
     )
     
-    csv_clusters = features_clientes_filtered[["CPF", "Nome_Cluster", "Total_Ingressos", "Valor_Total", "Ticket_Medio", "Num_Eventos"]].to_csv(index=False, encoding='utf-8-sig')
+    csv_clusters = csv_arrow_sob_demanda(features_clientes_filtered[["CPF", "Nome_Cluster", "Total_Ingressos", "Valor_Total", "Ticket_Medio", "Num_Eventos"]])
     
     st.download_button(
         label="📥 Download Análise de Clusters (CSV)",
@@ -446,7 +602,7 @@ def analise_clusters_geograficos(df_b, escala=2):
     
     # Filtra eventos excluídos da análise
     if "TDL Event" in df_b.columns:
-        df_b = df_b[df_b["TDL Event"] != "O BAILE DA MÚSICA BRASILEIRA COM CORDAO DO BOITATA E CONVIDADOS"].copy()
+        df_b = df_b[df_b["TDL Event"] != "O BAILE DA MÚSICA BRASILEIRA COM CORDAO DO BOITATA E CONVIDADOS"]
     
     # Verifica disponibilidade dos campos geográficos
     tem_bairro = "bairro_google_norm" in df_b.columns or "bairro_google" in df_b.columns
@@ -479,21 +635,14 @@ def analise_clusters_bairros(df_b, campo_bairro, escala=2):
     st.markdown("#### 🏘️ Análise por Bairros")
     
     # Filtra apenas dados com bairro informado
-    df_bairros = df_b[df_b[campo_bairro].notna()].copy()
+    df_bairros = df_b.loc[df_b[campo_bairro].notna(), [campo_bairro, *COLUNAS_REGIOES]]
     
     if df_bairros.empty:
         st.info("Não há dados de bairros disponíveis.")
         return
     
     # Agrupa por bairro
-    bairros_stats = df_bairros.groupby(campo_bairro).agg({
-        "TDL Sum Tickets (B+S-A)": "sum",
-        "TDL Sum Ticket Net Price (B+S-A)": "sum",
-        "TDL Customer CPF": "nunique",
-        "TDL Event": "nunique"
-    }).reset_index()
-    
-    bairros_stats.columns = ["Bairro", "Total_Ingressos", "Receita_Total", "Clientes_Unicos", "Eventos_Diferentes"]
+    bairros_stats = agregar_regioes(df_bairros, campo_bairro, "Bairro")
     
     # Calcula métricas derivadas
     bairros_stats["Ticket_Medio"] = (bairros_stats["Receita_Total"] / bairros_stats["Total_Ingressos"]).round(2)
@@ -510,181 +659,20 @@ def analise_clusters_bairros(df_b, campo_bairro, escala=2):
         st.warning("Dados insuficientes para análise de clusters de bairros.")
         return
     
-    # Prepara dados para clustering
-    X = bairros_stats[["Total_Ingressos", "Ticket_Medio", "Ingressos_por_Cliente"]].copy()
-    
-    # Normaliza
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-    
-    # Determina número de clusters
-    col1, col2 = st.columns([2, 1])
-    
-    with col1:
-        # Método do cotovelo
-        max_k = min(8, len(bairros_stats) // 5)
-        if max_k >= 2:
-            inertias = []
-            K_range = range(2, max_k + 1)
-            
-            for k in K_range:
-                kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-                kmeans.fit(X_scaled)
-                inertias.append(kmeans.inertia_)
-            
-            fig_cotovelo = go.Figure()
-            fig_cotovelo.add_trace(go.Scatter(
-                x=list(K_range),
-                y=inertias,
-                mode='lines+markers',
-                marker=dict(size=10, color='orange'),
-                line=dict(width=2)
-            ))
-            
-            fonts = get_font_sizes(escala)
-            fig_cotovelo.update_layout(
-                title="Método do Cotovelo - Clusters de Bairros",
-                xaxis_title="Número de Clusters (K)",
-                yaxis_title="Inércia",
-                title_font_size=fonts['title'],
-                xaxis_title_font_size=fonts['axis'],
-                yaxis_title_font_size=fonts['axis'],
-                xaxis_tickfont_size=fonts['tick'],
-                yaxis_tickfont_size=fonts['tick'],
-                height=400
-            )
-            st.plotly_chart(fig_cotovelo, use_container_width=True, config=get_plotly_config(escala))
-    
-    with col2:
-        st.markdown("#### 💡 Interpretação")
-        st.write("Clusters de bairros agrupam regiões com:")
-        st.write("- Padrões similares de consumo")
-        st.write("- Ticket médio semelhante")
-        st.write("- Comportamento de compra similar")
-    
-    # Slider para escolher número de clusters
-    n_clusters = st.slider(
-        "Número de clusters de bairros:",
-        min_value=2,
-        max_value=max_k if max_k >= 2 else 3,
-        value=min(4, max_k) if max_k >= 2 else 3,
-        key="slider_bairros"
-    )
-    
-    # Aplica K-means
-    kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-    bairros_stats["Cluster"] = kmeans.fit_predict(X_scaled)
-    
-    # Nomeia clusters
-    def nomear_cluster_bairro(row, stats_df):
-        if row["Ticket_Medio"] > stats_df["Ticket_Medio"].quantile(0.75):
-            return f"Cluster {row['Cluster']}: Premium"
-        elif row["Total_Ingressos"] > stats_df["Total_Ingressos"].quantile(0.75):
-            return f"Cluster {row['Cluster']}: Alto Volume"
-        elif row["Ingressos_por_Cliente"] > stats_df["Ingressos_por_Cliente"].quantile(0.75):
-            return f"Cluster {row['Cluster']}: Grupos Grandes"
-        else:
-            return f"Cluster {row['Cluster']}: Padrão"
-    
-    bairros_stats["Nome_Cluster"] = bairros_stats.apply(lambda row: nomear_cluster_bairro(row, bairros_stats), axis=1)
-    
-    # Visualizações
-    st.markdown("---")
-    st.markdown("#### 📊 Visualização dos Clusters de Bairros")
-    
-    fonts = get_font_sizes(escala)
-    
-    col_viz1, col_viz2 = st.columns(2)
-    
-    with col_viz1:
-        # Scatter: Total de Ingressos vs Ticket Médio
-        fig_scatter = px.scatter(
-            bairros_stats,
-            x="Total_Ingressos",
-            y="Ticket_Medio",
-            color="Nome_Cluster",
-            size="Clientes_Unicos",
-            hover_data=["Bairro"],
-            title="Bairros: Volume vs Ticket Médio",
-            labels={"Total_Ingressos": "Total de Ingressos", "Ticket_Medio": "Ticket Médio (R$)"}
-        )
-        
-        fig_scatter.update_layout(
-            title_font_size=fonts['title'],
-            xaxis_title_font_size=fonts['axis'],
-            yaxis_title_font_size=fonts['axis'],
-            xaxis_tickfont_size=fonts['tick'],
-            yaxis_tickfont_size=fonts['tick'],
-            legend_font_size=fonts['legend'],
-            height=450
-        )
-        st.plotly_chart(fig_scatter, use_container_width=True, config=get_plotly_config(escala))
-    
-    with col_viz2:
-        # Top 10 bairros por cluster
-        top_bairros_cluster = bairros_stats.nlargest(10, "Total_Ingressos")
-        
-        fig_top = px.bar(
-            top_bairros_cluster,
-            x="Bairro",
-            y="Total_Ingressos",
-            color="Nome_Cluster",
-            title="Top 10 Bairros por Volume",
-            labels={"Bairro": "Bairro", "Total_Ingressos": "Ingressos"}
-        )
-        
-        fig_top.update_layout(
-            title_font_size=fonts['title'],
-            xaxis_title_font_size=fonts['axis'],
-            yaxis_title_font_size=fonts['axis'],
-            xaxis_tickfont_size=fonts['tick'],
-            yaxis_tickfont_size=fonts['tick'],
-            legend_font_size=fonts['legend'],
-            xaxis_tickangle=-45,
-            height=450
-        )
-        st.plotly_chart(fig_top, use_container_width=True, config=get_plotly_config(escala))
-    
-    # Estatísticas por cluster
-    st.markdown("---")
-    st.markdown("#### 📋 Características dos Clusters de Bairros")
-    
-    cluster_summary = bairros_stats.groupby("Nome_Cluster").agg({
-        "Bairro": "count",
-        "Total_Ingressos": ["sum", "mean"],
-        "Receita_Total": "sum",
-        "Ticket_Medio": "mean",
-        "Clientes_Unicos": "sum"
-    }).round(2)
-    
-    cluster_summary.columns = ["Qtd_Bairros", "Total_Ingressos", "Media_Ingressos", "Receita_Total", "Ticket_Medio", "Total_Clientes"]
-    cluster_summary = cluster_summary.reset_index()
-    
-    # Exibe cards
-    cols = st.columns(min(n_clusters, 3))
-    for idx, (_, cluster_info) in enumerate(cluster_summary.iterrows()):
-        with cols[idx % 3]:
-            st.markdown(f"**{cluster_info['Nome_Cluster']}**")
-            st.metric("Bairros", int(cluster_info['Qtd_Bairros']))
-            st.metric("Total Ingressos", f"{int(cluster_info['Total_Ingressos']):,}".replace(",", "."))
-            st.metric("Ticket Médio", f"R$ {cluster_info['Ticket_Medio']:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
-            st.metric("Clientes", f"{int(cluster_info['Total_Clientes']):,}".replace(",", "."))
-    
-    # Tabela de bairros por cluster
-    with st.expander("🔍 Ver lista completa de bairros por cluster"):
-        for cluster_name in bairros_stats["Nome_Cluster"].unique():
-            st.markdown(f"**{cluster_name}**")
-            bairros_cluster = bairros_stats[bairros_stats["Nome_Cluster"] == cluster_name][["Bairro", "Total_Ingressos", "Ticket_Medio"]].sort_values("Total_Ingressos", ascending=False)
-            st.dataframe(bairros_cluster, hide_index=True, use_container_width=True)
-    
-    # Download
-    csv_bairros = bairros_stats.to_csv(index=False, encoding='utf-8-sig')
-    st.download_button(
-        label="📥 Download Clusters de Bairros (CSV)",
-        data=csv_bairros,
-        file_name="clusters_geograficos_bairros.csv",
-        mime="text/csv",
-        use_container_width=True
+    analise_clusters_regionais(
+        bairros_stats,
+        regiao="Bairro",
+        nomear=nomear_clusters_bairros,
+        cor="orange",
+        interpretacao=[
+            "Clusters de bairros agrupam regiões com:",
+            "- Padrões similares de consumo",
+            "- Ticket médio semelhante",
+            "- Comportamento de compra similar"
+        ],
+        top_n=10,
+        colunas_lista=["Bairro", "Total_Ingressos", "Ticket_Medio"],
+        escala=escala
     )
 
 
@@ -693,21 +681,14 @@ def analise_clusters_cidades(df_b, escala=2):
     st.markdown("#### 🌆 Análise por Cidades")
     
     # Filtra apenas dados com cidade informada
-    df_cidades = df_b[df_b["cidade_google"].notna()].copy()
+    df_cidades = df_b.loc[df_b["cidade_google"].notna(), ["cidade_google", *COLUNAS_REGIOES]]
     
     if df_cidades.empty:
         st.info("Não há dados de cidades disponíveis.")
         return
     
     # Agrupa por cidade
-    cidades_stats = df_cidades.groupby("cidade_google").agg({
-        "TDL Sum Tickets (B+S-A)": "sum",
-        "TDL Sum Ticket Net Price (B+S-A)": "sum",
-        "TDL Customer CPF": "nunique",
-        "TDL Event": "nunique"
-    }).reset_index()
-    
-    cidades_stats.columns = ["Cidade", "Total_Ingressos", "Receita_Total", "Clientes_Unicos", "Eventos_Diferentes"]
+    cidades_stats = agregar_regioes(df_cidades, "cidade_google", "Cidade")
     
     # Calcula métricas derivadas
     cidades_stats["Ticket_Medio"] = (cidades_stats["Receita_Total"] / cidades_stats["Total_Ingressos"]).round(2)
@@ -724,40 +705,90 @@ def analise_clusters_cidades(df_b, escala=2):
         st.warning("Dados insuficientes para análise de clusters de cidades.")
         return
     
-    # Prepara dados para clustering
-    X = cidades_stats[["Total_Ingressos", "Ticket_Medio", "Ingressos_por_Cliente"]].copy()
+    analise_clusters_regionais(
+        cidades_stats,
+        regiao="Cidade",
+        nomear=nomear_clusters_cidades,
+        cor="green",
+        interpretacao=[
+            "Clusters de cidades identificam:",
+            "- Mercados regionais similares",
+            "- Potencial de expansão",
+            "- Padrões de consumo por região"
+        ],
+        top_n=15,
+        colunas_lista=["Cidade", "Total_Ingressos", "Ticket_Medio", "Clientes_Unicos"],
+        escala=escala
+    )
+
+
+def nomear_clusters_bairros(stats):
+    """Perfis dos clusters de bairros"""
+    q75_ticket, q75_ingressos, q75_por_cliente = np.quantile(
+        stats[["Ticket_Medio", "Total_Ingressos", "Ingressos_por_Cliente"]].to_numpy(), 0.75, axis=0
+    )
+    return nomear_clusters(
+        stats["Cluster"],
+        [
+            stats["Ticket_Medio"] > q75_ticket,
+            stats["Total_Ingressos"] > q75_ingressos,
+            stats["Ingressos_por_Cliente"] > q75_por_cliente
+        ],
+        ["Premium", "Alto Volume", "Grupos Grandes"],
+        "Padrão"
+    )
+
+
+def nomear_clusters_cidades(stats):
+    """Perfis dos clusters de cidades"""
+    # Quartil superior e mediana das duas colunas em uma única seleção
+    (q75_ingressos, q75_ticket), (mediana_ingressos, _) = np.quantile(
+        stats[["Total_Ingressos", "Ticket_Medio"]].to_numpy(), [0.75, 0.5], axis=0
+    )
+    return nomear_clusters(
+        stats["Cluster"],
+        [
+            stats["Total_Ingressos"] > q75_ingressos,
+            stats["Ticket_Medio"] > q75_ticket,
+            stats["Total_Ingressos"] > mediana_ingressos
+        ],
+        ["Mercado Principal", "Alto Valor", "Mercado Secundário"],
+        "Emergente"
+    )
+
+
+def analise_clusters_regionais(stats, regiao, nomear, cor, interpretacao, top_n, colunas_lista, escala=2):
+    """
+    Clusterização comum a bairros e cidades a partir das estatísticas já agregadas por região
+    (colunas: região, Total_Ingressos, Receita_Total, Ticket_Medio, Ingressos_por_Cliente, Clientes_Unicos).
+    """
+    regioes = f"{regiao}s"
     
-    # Normaliza
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    # Normaliza uma única vez (a mesma matriz alimenta cotovelo e K-means final)
+    X_scaled = normalizar_features(stats, ("Total_Ingressos", "Ticket_Medio", "Ingressos_por_Cliente"))
     
     # Determina número de clusters
     col1, col2 = st.columns([2, 1])
     
     with col1:
         # Método do cotovelo
-        max_k = min(8, len(cidades_stats) // 5)
+        max_k = min(8, len(stats) // 5)
         if max_k >= 2:
-            inertias = []
             K_range = range(2, max_k + 1)
-            
-            for k in K_range:
-                kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-                kmeans.fit(X_scaled)
-                inertias.append(kmeans.inertia_)
+            inertias = calcular_inercias(X_scaled, 2, max_k)
             
             fig_cotovelo = go.Figure()
             fig_cotovelo.add_trace(go.Scatter(
                 x=list(K_range),
                 y=inertias,
                 mode='lines+markers',
-                marker=dict(size=10, color='green'),
+                marker=dict(size=10, color=cor),
                 line=dict(width=2)
             ))
             
             fonts = get_font_sizes(escala)
             fig_cotovelo.update_layout(
-                title="Método do Cotovelo - Clusters de Cidades",
+                title=f"Método do Cotovelo - Clusters de {regioes}",
                 xaxis_title="Número de Clusters (K)",
                 yaxis_title="Inércia",
                 title_font_size=fonts['title'],
@@ -771,40 +802,43 @@ def analise_clusters_cidades(df_b, escala=2):
     
     with col2:
         st.markdown("#### 💡 Interpretação")
-        st.write("Clusters de cidades identificam:")
-        st.write("- Mercados regionais similares")
-        st.write("- Potencial de expansão")
-        st.write("- Padrões de consumo por região")
+        for linha in interpretacao:
+            st.write(linha)
+    
+    render_clusters_regionais(stats, X_scaled, regiao, nomear, top_n, colunas_lista, max_k, escala)
+
+
+@st.fragment
+def render_clusters_regionais(stats, X_scaled, regiao, nomear, top_n, colunas_lista, max_k, escala=2):
+    """
+    Renderiza o K-means final de bairros ou cidades como fragmento.
+    
+    Mudanças no slider reexecutam apenas este trecho, sem refazer a agregação
+    por região e o cotovelo.
+    """
+    regioes = f"{regiao}s"
     
     # Slider para escolher número de clusters
     n_clusters = st.slider(
-        "Número de clusters de cidades:",
+        f"Número de clusters de {regioes.lower()}:",
         min_value=2,
         max_value=max_k if max_k >= 2 else 3,
         value=min(4, max_k) if max_k >= 2 else 3,
-        key="slider_cidades"
+        key=f"slider_{regioes.lower()}"
     )
     
     # Aplica K-means
-    kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-    cidades_stats["Cluster"] = kmeans.fit_predict(X_scaled)
+    stats["Cluster"] = ajustar_kmeans(X_scaled, n_clusters)
     
     # Nomeia clusters
-    def nomear_cluster_cidade(row, stats_df):
-        if row["Total_Ingressos"] > stats_df["Total_Ingressos"].quantile(0.75):
-            return f"Cluster {row['Cluster']}: Mercado Principal"
-        elif row["Ticket_Medio"] > stats_df["Ticket_Medio"].quantile(0.75):
-            return f"Cluster {row['Cluster']}: Alto Valor"
-        elif row["Total_Ingressos"] > stats_df["Total_Ingressos"].median():
-            return f"Cluster {row['Cluster']}: Mercado Secundário"
-        else:
-            return f"Cluster {row['Cluster']}: Emergente"
-    
-    cidades_stats["Nome_Cluster"] = cidades_stats.apply(lambda row: nomear_cluster_cidade(row, cidades_stats), axis=1)
+    stats["Nome_Cluster"] = nomear(stats)
+    
+    # Ordena uma única vez por volume; top N e listas por cluster reaproveitam essa ordem
+    stats_ordenado = stats.sort_values("Total_Ingressos", ascending=False, kind="mergesort")
     
     # Visualizações
     st.markdown("---")
-    st.markdown("#### 📊 Visualização dos Clusters de Cidades")
+    st.markdown(f"#### 📊 Visualização dos Clusters de {regioes}")
     
     fonts = get_font_sizes(escala)
     
@@ -813,13 +847,13 @@ def analise_clusters_cidades(df_b, escala=2):
     with col_viz1:
         # Scatter: Total de Ingressos vs Ticket Médio
         fig_scatter = px.scatter(
-            cidades_stats,
+            stats,
             x="Total_Ingressos",
             y="Ticket_Medio",
             color="Nome_Cluster",
             size="Clientes_Unicos",
-            hover_data=["Cidade"],
-            title="Cidades: Volume vs Ticket Médio",
+            hover_data=[regiao],
+            title=f"{regioes}: Volume vs Ticket Médio",
             labels={"Total_Ingressos": "Total de Ingressos", "Ticket_Medio": "Ticket Médio (R$)"}
         )
         
@@ -835,16 +869,16 @@ def analise_clusters_cidades(df_b, escala=2):
         st.plotly_chart(fig_scatter, use_container_width=True, config=get_plotly_config(escala))
     
     with col_viz2:
-        # Top 15 cidades por cluster
-        top_cidades_cluster = cidades_stats.nlargest(15, "Total_Ingressos")
+        # Top N regiões por cluster
+        top_cluster = stats_ordenado.head(top_n)
         
         fig_top = px.bar(
-            top_cidades_cluster,
-            x="Cidade",
+            top_cluster,
+            x=regiao,
             y="Total_Ingressos",
             color="Nome_Cluster",
-            title="Top 15 Cidades por Volume",
-            labels={"Cidade": "Cidade", "Total_Ingressos": "Ingressos"}
+            title=f"Top {top_n} {regioes} por Volume",
+            labels={regiao: regiao, "Total_Ingressos": "Ingressos"}
         )
         
         fig_top.update_layout(
@@ -861,42 +895,41 @@ def analise_clusters_cidades(df_b, escala=2):
     
     # Estatísticas por cluster
     st.markdown("---")
-    st.markdown("#### 📋 Características dos Clusters de Cidades")
-    
-    cluster_summary = cidades_stats.groupby("Nome_Cluster").agg({
-        "Cidade": "count",
-        "Total_Ingressos": ["sum", "mean"],
-        "Receita_Total": "sum",
-        "Ticket_Medio": "mean",
-        "Clientes_Unicos": "sum"
-    }).round(2)
-    
-    cluster_summary.columns = ["Qtd_Cidades", "Total_Ingressos", "Media_Ingressos", "Receita_Total", "Ticket_Medio", "Total_Clientes"]
-    cluster_summary = cluster_summary.reset_index()
+    st.markdown(f"#### 📋 Características dos Clusters de {regioes}")
+    
+    # Agregações nomeadas já saem com os nomes finais das colunas
+    cluster_summary = stats.groupby("Nome_Cluster").agg(
+        **{f"Qtd_{regioes}": (regiao, "size")},
+        Total_Ingressos=("Total_Ingressos", "sum"),
+        Media_Ingressos=("Total_Ingressos", "mean"),
+        Receita_Total=("Receita_Total", "sum"),
+        Ticket_Medio=("Ticket_Medio", "mean"),
+        Total_Clientes=("Clientes_Unicos", "sum")
+    ).round(2).reset_index()
     
     # Exibe cards
     cols = st.columns(min(n_clusters, 3))
     for idx, (_, cluster_info) in enumerate(cluster_summary.iterrows()):
         with cols[idx % 3]:
             st.markdown(f"**{cluster_info['Nome_Cluster']}**")
-            st.metric("Cidades", int(cluster_info['Qtd_Cidades']))
+            st.metric(regioes, int(cluster_info[f"Qtd_{regioes}"]))
             st.metric("Total Ingressos", f"{int(cluster_info['Total_Ingressos']):,}".replace(",", "."))
-            st.metric("Ticket Médio", f"R$ {cluster_info['Ticket_Medio']:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+            st.metric("Ticket Médio", f"R$ {formatar_br(cluster_info['Ticket_Medio'])}")
             st.metric("Clientes", f"{int(cluster_info['Total_Clientes']):,}".replace(",", "."))
     
-    # Tabela de cidades por cluster
-    with st.expander("🔍 Ver lista completa de cidades por cluster"):
-        for cluster_name in cidades_stats["Nome_Cluster"].unique():
+    # Tabela de regiões por cluster
+    with st.expander(f"🔍 Ver lista completa de {regioes.lower()} por cluster"):
+        # Um único groupby separa as listas, já em ordem de volume, na mesma ordem dos cards
+        for cluster_name, regioes_cluster in stats_ordenado.groupby("Nome_Cluster")[colunas_lista]:
             st.markdown(f"**{cluster_name}**")
-            cidades_cluster = cidades_stats[cidades_stats["Nome_Cluster"] == cluster_name][["Cidade", "Total_Ingressos", "Ticket_Medio", "Clientes_Unicos"]].sort_values("Total_Ingressos", ascending=False)
-            st.dataframe(cidades_cluster, hide_index=True, use_container_width=True)
+            st.dataframe(regioes_cluster, hide_index=True, use_container_width=True)
     
     # Download
-    csv_cidades = cidades_stats.to_csv(index=False, encoding='utf-8-sig')
+    csv_regioes = csv_sob_demanda(stats)
     st.download_button(
-        label="📥 Download Clusters de Cidades (CSV)",
-        data=csv_cidades,
-        file_name="clusters_geograficos_cidades.csv",
+        label=f"📥 Download Clusters de {regioes} (CSV)",
+        data=csv_regioes,
+        file_name=f"clusters_geograficos_{regioes.lower()}.csv",
         mime="text/csv",
         use_container_width=True
     )
@@ -1,10 +1,25 @@
+from functools import lru_cache
+from types import MappingProxyType
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import numpy as np
+import plotly.graph_objects as go
 
+# Tratamentos da base traduzidos para gênero em português
+MAPA_GENERO = {
+    "Mr": "Masculino",
+    "Ms": "Feminino",
+    "Sr": "Masculino",
+    "Sr.": "Masculino",
+    "Sra": "Feminino",
+    "Sra.": "Feminino",
+    "- no TDL data available -": "Não informado"
+}
 
+
+@lru_cache(maxsize=8)
 def get_plotly_config(escala=2):
-    """Retorna configuração otimizada para gráficos Plotly"""
+    """Retorna configuração otimizada para gráficos Plotly (compartilhada: não alterar)"""
     return {
         'toImageButtonOptions': {
             'format': 'png',
@@ -18,58 +33,104 @@ def get_plotly_config(escala=2):
     }
 
 
+@lru_cache(maxsize=8)
 def get_font_sizes(escala=2):
-    """Retorna tamanhos de fonte base aumentados"""
-    return {
+    """Retorna tamanhos de fonte base aumentados (somente leitura)"""
+    return MappingProxyType({
         'title': 24,
         'axis': 18,
         'tick': 16,
         'legend': 16,
         'annotation': 16
-    }
+    })
+
+
+def mapear_genero(tratamento):
+    """
+    Gênero como categórico, mapeado uma vez por categoria de tratamento
+    (nulos e tratamentos fora do mapa viram "Não informado").
+    """
+    tratamentos = tratamento.astype("category")
+    # O último item atende o código -1 (nulo)
+    generos = [MAPA_GENERO.get(t, "Não informado") for t in tratamentos.cat.categories] + ["Não informado"]
+    codigos, nomes = pd.factorize(pd.Index(generos), sort=True)
+    return pd.Series(
+        pd.Categorical.from_codes(codigos[tratamentos.cat.codes.to_numpy()], categories=nomes),
+        index=tratamento.index,
+        name="Gênero"
+    )
+
+
+def agregar_faixa_genero(faixa, genero, ingressos):
+    """
+    Soma de ingressos e quantidade de linhas por faixa etária × gênero, via np.bincount
+    sobre os códigos dos categóricos. Nulos ficam na última posição de cada eixo e um
+    eixo ausente (None) vira uma posição única. Retorna duas matrizes (faixa, gênero).
+    """
+    eixos = []
+    for chave in (faixa, genero):
+        if chave is None:
+            eixos.append((np.zeros(len(ingressos), dtype=np.intp), 1))
+        else:
+            categorias = chave.astype("category").cat
+            codigos = categorias.codes.to_numpy().astype(np.intp)
+            codigos[codigos < 0] = len(categorias.categories)
+            eixos.append((codigos, len(categorias.categories) + 1))
+    (codigos_faixa, n_faixas), (codigos_genero, n_generos) = eixos
+    
+    # Código combinado (faixa, gênero) -> uma única passada de bincount por métrica
+    combinado = codigos_faixa * n_generos + codigos_genero
+    tamanho = n_faixas * n_generos
+    soma = np.bincount(combinado, weights=ingressos.to_numpy(dtype=np.float64, na_value=0.0), minlength=tamanho)
+    if pd.api.types.is_integer_dtype(ingressos):
+        soma = soma.astype(np.int64)
+    contagem = np.bincount(combinado, minlength=tamanho)
+    return soma.reshape(n_faixas, n_generos), contagem.reshape(n_faixas, n_generos)
 
 
 def analise_demografica(df_b, escala=2):
     """Exibe análises demográficas dos clientes"""
     st.markdown("### 👥 Perfil Demográfico dos Clientes")
     
+    # Fontes e configuração dos gráficos resolvidas uma vez para a página
+    fonts = get_font_sizes(escala)
+    config_plotly = get_plotly_config(escala)
+    
+    # Mapeia o gênero uma única vez (usado na pizza e no cruzamento)
+    genero = mapear_genero(df_b["TDL Customer Salutation"]) if "TDL Customer Salutation" in df_b.columns else None
+    
+    # Uma única tabela (faixa etária × gênero) alimenta os três gráficos:
+    # soma de ingressos para pizza e cruzamento, quantidade de linhas para as faixas.
+    # A posição de nulos mantém quem não tem faixa etária na contagem por gênero.
+    faixa = df_b["Faixa Etária"].astype("category") if "Faixa Etária" in df_b.columns else None
+    soma, contagem = agregar_faixa_genero(faixa, genero, df_b["TDL Sum Tickets (B+S-A)"])
+    
     col_demo1, col_demo2 = st.columns(2)
     
     with col_demo1:
         st.markdown("#### Distribuição por Gênero")
-        if "TDL Customer Salutation" in df_b.columns:
-            # Mapeia os valores para português ANTES de contar
-            mapa_genero = {
-                "Mr": "Masculino",
-                "Ms": "Feminino",
-                "Sr": "Masculino",
-                "Sr.": "Masculino",
-                "Sra": "Feminino",
-                "Sra.": "Feminino",
-                "- no TDL data available -": "Não informado"
-            }
-            df_b_genero = df_b.copy()
-            df_b_genero["Gênero"] = df_b_genero["TDL Customer Salutation"].map(mapa_genero).fillna("Não informado")
-            
-            # Agora agrupa por gênero já mapeado
-            genero_count = df_b_genero.groupby("Gênero")["TDL Sum Tickets (B+S-A)"].sum().reset_index()
-            genero_count.columns = ["Gênero", "Quantidade"]
-            genero_count = genero_count[genero_count["Gênero"].notna()].sort_values("Quantidade", ascending=False)
+        if genero is not None:
+            # Soma por gênero (todas as faixas, inclusive sem faixa), só gêneros presentes
+            n_generos = len(genero.cat.categories)
+            presentes = np.flatnonzero(contagem[:, :n_generos].sum(axis=0) > 0)
+            genero_count = pd.DataFrame({
+                "Gênero": pd.Categorical.from_codes(presentes, dtype=genero.dtype),
+                "Quantidade": soma[:, presentes].sum(axis=0)
+            }).sort_values("Quantidade", ascending=False)
             
-            fig_genero = px.pie(
-                genero_count,
-                values="Quantidade",
-                names="Gênero",
-                title="Ingressos por Gênero",
+            # Poucas fatias: monta a trace direto, sem a introspecção do px
+            fig_genero = go.Figure(go.Pie(
+                labels=genero_count["Gênero"].to_numpy(),
+                values=genero_count["Quantidade"].to_numpy(),
                 hole=0.4
-            )
-            fonts = get_font_sizes(escala)
+            ))
+            fig_genero.update_layout(title="Ingressos por Gênero")
             fig_genero.update_layout(
                 title_font_size=fonts['title'],
                 legend_font_size=fonts['legend'],
                 font_size=fonts['annotation']
             )
-            st.plotly_chart(fig_genero, use_container_width=True, config=get_plotly_config(escala))
+            st.plotly_chart(fig_genero, use_container_width=True, config=config_plotly, key="demografico_genero")
             
             with st.expander("📊 Ver dados da tabela"):
                 st.dataframe(genero_count, hide_index=True, use_container_width=True)
@@ -79,23 +140,28 @@ def analise_demografica(df_b, escala=2):
     with col_demo2:
         st.markdown("#### Distribuição por Faixa Etária")
         if "Faixa Etária" in df_b.columns:
-            idade_count = df_b["Faixa Etária"].value_counts().sort_index().reset_index()
-            idade_count.columns = ["Faixa Etária", "Quantidade"]
-            idade_count = idade_count[idade_count["Faixa Etária"].notna()]
+            # Todas as faixas, inclusive as sem ingressos (com zero), como o value_counts
+            n_faixas = len(faixa.cat.categories)
+            idade_count = pd.DataFrame({
+                "Faixa Etária": pd.Categorical.from_codes(np.arange(n_faixas), dtype=faixa.dtype),
+                "Quantidade": contagem[:n_faixas].sum(axis=1)
+            })
             
             # Calcula percentuais
             total_idade = idade_count["Quantidade"].sum()
             idade_count["Percentual"] = (idade_count["Quantidade"] / total_idade * 100).round(1)
             
-            fig_idade = px.bar(
-                idade_count,
-                x="Faixa Etária",
-                y="Quantidade",
-                labels={"Faixa Etária": "Idade", "Quantidade": "Ingressos"},
+            # Gráfico de poucas barras: monta a trace direto, sem a introspecção do px
+            fig_idade = go.Figure(go.Bar(
+                x=idade_count["Faixa Etária"].to_numpy(),
+                y=idade_count["Quantidade"].to_numpy(),
+                text=(idade_count["Percentual"].astype(str) + "%").to_numpy()
+            ))
+            fig_idade.update_layout(
                 title="Ingressos por Faixa Etária",
-                text=idade_count["Percentual"].apply(lambda x: f"{x}%")
+                xaxis_title="Idade",
+                yaxis_title="Ingressos"
             )
-            fonts = get_font_sizes(escala)
             fig_idade.update_traces(textposition='outside', textfont_size=fonts['annotation'])
             fig_idade.update_layout(
                 title_font_size=fonts['title'],
@@ -104,7 +170,7 @@ def analise_demografica(df_b, escala=2):
                 xaxis_tickfont_size=fonts['tick'],
                 yaxis_tickfont_size=fonts['tick']
             )
-            st.plotly_chart(fig_idade, use_container_width=True, config=get_plotly_config(escala))
+            st.plotly_chart(fig_idade, use_container_width=True, config=config_plotly, key="demografico_idade")
             
             with st.expander("📊 Ver dados da tabela"):
                 st.dataframe(idade_count, hide_index=True, use_container_width=True)
@@ -115,47 +181,40 @@ def analise_demografica(df_b, escala=2):
     if "TDL Customer Salutation" in df_b.columns and "Faixa Etária" in df_b.columns:
         st.markdown("#### Distribuição por Gênero e Faixa Etária")
         
-        # Prepara os dados
-        df_demo = df_b[["TDL Customer Salutation", "Faixa Etária", "TDL Sum Tickets (B+S-A)"]].copy()
-        
-        # Mapeia gênero
-        mapa_genero = {
-            "Mr": "Masculino",
-            "Ms": "Feminino",
-            "Sr": "Masculino",
-            "Sr.": "Masculino",
-            "Sra": "Feminino",
-            "Sra.": "Feminino",
-            "- no TDL data available -": "Não informado"
-        }
-        df_demo["Gênero"] = df_demo["TDL Customer Salutation"].map(mapa_genero).fillna("Não informado")
+        # Matrizes sem a posição de nulos; percentuais por faixa direto nas linhas
+        n_faixas = len(faixa.cat.categories)
+        n_generos = len(genero.cat.categories)
+        soma_cruzada = soma[:n_faixas, :n_generos]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percentual = soma_cruzada / soma_cruzada.sum(axis=1, keepdims=True) * 100
         
-        cruzamento = (
-            df_demo.groupby(["Faixa Etária", "Gênero"])["TDL Sum Tickets (B+S-A)"]
-            .sum()
-            .reset_index()
-        )
-        cruzamento = cruzamento[cruzamento["Faixa Etária"].notna() & cruzamento["Gênero"].notna()]
-        
-        # Calcula percentuais por grupo
-        total_por_faixa = cruzamento.groupby("Faixa Etária")["TDL Sum Tickets (B+S-A)"].transform('sum')
-        cruzamento["Percentual"] = (cruzamento["TDL Sum Tickets (B+S-A)"] / total_por_faixa * 100).round(1)
+        # Formato longo só com as combinações observadas, na ordem faixa → gênero
+        linhas, colunas = np.nonzero(contagem[:n_faixas, :n_generos])
+        cruzamento = pd.DataFrame({
+            "Faixa Etária": pd.Categorical.from_codes(linhas, dtype=faixa.dtype),
+            "Gênero": pd.Categorical.from_codes(colunas, dtype=genero.dtype),
+            "TDL Sum Tickets (B+S-A)": soma_cruzada[linhas, colunas],
+            "Percentual": percentual[linhas, colunas].round(1)
+        })
         
-        fig_cruzamento = px.bar(
-            cruzamento,
-            x="Faixa Etária",
-            y="TDL Sum Tickets (B+S-A)",
-            color="Gênero",
+        # Monta uma trace por gênero direto, sem a introspecção do px
+        fig_cruzamento = go.Figure([
+            go.Bar(
+                x=grupo["Faixa Etária"].to_numpy(),
+                y=grupo["TDL Sum Tickets (B+S-A)"].to_numpy(),
+                text=(grupo["Percentual"].astype(str) + "%").to_numpy(),
+                name=str(genero_grupo),
+                legendgroup=str(genero_grupo)
+            )
+            for genero_grupo, grupo in cruzamento.groupby("Gênero", observed=True, sort=False)
+        ])
+        fig_cruzamento.update_layout(
             barmode="group",
-            labels={
-                "Faixa Etária": "Idade",
-                "TDL Sum Tickets (B+S-A)": "Ingressos",
-                "Gênero": "Gênero"
-            },
             title="Distribuição de ingressos por gênero e faixa etária",
-            text=cruzamento["Percentual"].apply(lambda x: f"{x}%")
+            xaxis_title="Idade",
+            yaxis_title="Ingressos",
+            legend_title_text="Gênero"
         )
-        fonts = get_font_sizes(escala)
         fig_cruzamento.update_traces(textposition='outside', textfont_size=fonts['annotation'])
         fig_cruzamento.update_layout(
             title_font_size=fonts['title'],
@@ -165,15 +224,16 @@ def analise_demografica(df_b, escala=2):
             yaxis_tickfont_size=fonts['tick'],
             legend_font_size=fonts['legend']
         )
-        st.plotly_chart(fig_cruzamento, use_container_width=True, config=get_plotly_config(escala))
+        st.plotly_chart(fig_cruzamento, use_container_width=True, config=config_plotly, key="demografico_cruzamento")
         
         with st.expander("📊 Ver dados da tabela"):
-            # Cria tabela pivotada para melhor visualização
-            tabela_cruzamento = cruzamento.pivot_table(
-                index="Faixa Etária", 
-                columns="Gênero", 
-                values="TDL Sum Tickets (B+S-A)", 
-                aggfunc='sum'
-            ).fillna(0)
-            tabela_cruzamento = tabela_cruzamento.astype(int)
+            # Tabela pivotada direto da matriz, com as faixas e gêneros observados
+            faixas_presentes = np.unique(linhas)
+            generos_presentes = np.unique(colunas)
+            tabela_cruzamento = pd.DataFrame(
+                soma_cruzada[np.ix_(faixas_presentes, generos_presentes)].astype(int),
+                index=pd.CategoricalIndex(faixa.cat.categories[faixas_presentes], dtype=faixa.dtype, name="Faixa Etária"),
+                # Cabeçalhos de gênero como texto simples (o eixo categórico não vai para a tabela)
+                columns=pd.Index(genero.cat.categories[generos_presentes].astype(str), name="Gênero")
+            )
             st.dataframe(tabela_cruzamento, use_container_width=True)
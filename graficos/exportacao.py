@@ -0,0 +1,29 @@
+# Exportação de tabelas em CSV, compartilhada por app, gráficos e clusters
+import codecs
+from io import BytesIO
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+
+def csv_sob_demanda(df, index=False):
+    """Adia a geração do CSV (UTF-8 com BOM, abre direto no Excel) para o clique no botão de download"""
+    return lambda: df.to_csv(index=index).encode("utf-8-sig")
+
+
+def gerar_csv_arrow(df):
+    """CSV em UTF-8 com BOM escrito pelo gravador em C++ do Arrow (para tabelas grandes)"""
+    # Colunas de texto/categóricas viram string (o Arrow não converte colunas object com tipos misturados)
+    df = df.astype({
+        col: "string" for col in df.columns
+        if pd.api.types.is_object_dtype(df[col]) or isinstance(df[col].dtype, pd.CategoricalDtype)
+    })
+    buffer = BytesIO()
+    buffer.write(codecs.BOM_UTF8)
+    pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buffer)
+    return buffer.getvalue()
+
+
+def csv_arrow_sob_demanda(df):
+    """Adia a geração do CSV pelo Arrow para o clique no botão de download"""
+    return lambda: gerar_csv_arrow(df)
@@ -0,0 +1,9 @@
+# Formatação numérica no padrão brasileiro, compartilhada por app, gráficos e clusters
+
+# Troca os separadores do formato americano (1,234.56) pelo brasileiro (1.234,56)
+SEPARADORES_BR = str.maketrans(",.", ".,")
+
+
+def formatar_br(valor):
+    """Formata número com duas casas decimais no padrão brasileiro"""
+    return f"{valor:,.2f}".translate(SEPARADORES_BR)
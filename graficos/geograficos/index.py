@@ -174,7 +174,7 @@ def mapa_brasil(df_b, carregar_geojson_brasil_func, escala=2):
             
             # Mostra distribuição por país como alternativa
             por_pais = (
-                df_b.groupby("TDL Customer Country")["TDL Sum Tickets (B+S-A)"]
+                df_b.groupby("TDL Customer Country", observed=True)["TDL Sum Tickets (B+S-A)"]
                 .sum()
                 .reset_index()
                 .sort_values("TDL Sum Tickets (B+S-A)", ascending=False)
@@ -189,7 +189,7 @@ def mapa_brasil(df_b, carregar_geojson_brasil_func, escala=2):
                 por_pais.head(10),
                 x="País",
                 y="Ingressos",
-                text=por_pais.head(10)["Percentual (%)"].apply(lambda x: f"{x}%"),
+                text=por_pais.head(10)["Percentual (%)"].astype(str) + "%",
                 title="Top 10 Países - Ingressos vendidos",
                 color="Ingressos",
                 color_continuous_scale="Blues"
@@ -317,21 +317,28 @@ def mapa_estado_rj(df_b, carregar_geojson_municipios_rj_func, escala=2):
         st.info("Colunas 'uf_google' e/ou 'cidade_google_norm' não encontradas para criar o mapa do RJ.")
 
 
-def mapa_ras_capital(df_b, carregar_geojson_ras_func, escala=2):
-    """Exibe mapa das Regiões Administrativas da capital do RJ"""
+def mapa_ras_capital(df_b, carregar_geojson_ras_func, escala=2, por_ra=None):
+    """
+    Exibe mapa das Regiões Administrativas da capital do RJ
+    
+    Aceita o agrupamento por RA já calculado pela aba (por_ra) para não
+    reagrupar o recorte.
+    """
     st.markdown("#### Mapa Oficial - Ingressos por Região Administrativa")
     if not df_b.empty and "RA" in df_b.columns:
         # Carrega os limites oficiais das RAs
         ra_gdf = carregar_geojson_ras_func()
         
         if ra_gdf is not None:
-            # Agrupa ingressos por RA
-            por_ra_mapa = (
-                df_b.groupby("RA")["TDL Sum Tickets (B+S-A)"]
-                .sum()
-                .reset_index()
-            )
-            por_ra_mapa = por_ra_mapa[por_ra_mapa["RA"].notna()]
+            # Agrupa ingressos por RA (ou reaproveita o agrupamento recebido)
+            if por_ra is not None:
+                por_ra_mapa = por_ra[["RA", "TDL Sum Tickets (B+S-A)"]]
+            else:
+                por_ra_mapa = (
+                    df_b.groupby("RA", observed=True)["TDL Sum Tickets (B+S-A)"]
+                    .sum()
+                    .reset_index()
+                )
             
             # Mapeamento direto das RAs
             if "nomera" in ra_gdf.columns:
@@ -439,7 +446,7 @@ def grafico_bairros_por_tipo_ingresso(df_b, escala=2):
     if not df_b.empty and bairro_col in df_b.columns and tipo_ingresso_col in df_b.columns:
         # Agrupa por bairro e tipo de ingresso
         bairro_tipo = (
-            df_b.groupby([bairro_col, tipo_ingresso_col])["TDL Sum Tickets (B+S-A)"]
+            df_b.groupby([bairro_col, tipo_ingresso_col], observed=True)["TDL Sum Tickets (B+S-A)"]
             .sum()
             .reset_index()
         )
@@ -473,7 +480,7 @@ def grafico_bairros_por_tipo_ingresso(df_b, escala=2):
                     tipo_ingresso_col: "Tipo de Ingresso"
                 },
                 title="Top 15 Bairros por Tipo de Ingresso",
-                text=bairro_tipo_top["Percentual"].apply(lambda x: f"{x}%")
+                text=bairro_tipo_top["Percentual"].astype(str) + "%"
             )
             
             fonts = get_font_sizes(escala)
@@ -492,9 +499,12 @@ def grafico_bairros_por_tipo_ingresso(df_b, escala=2):
             st.plotly_chart(fig_bairro_tipo, use_container_width=True, config=get_plotly_config(escala))
             
             with st.expander("📊 Ver dados da tabela"):
-                # Cria tabela pivotada para melhor visualização
-                tabela_bairro_tipo = bairro_tipo_top.pivot(index=bairro_col, columns=tipo_ingresso_col, values="TDL Sum Tickets (B+S-A)").fillna(0)
-                tabela_bairro_tipo = tabela_bairro_tipo.astype(int)
+                # Cria tabela pivotada (unstack preenche com 0; inteiros mesmo se a coluna vier em float)
+                tabela_bairro_tipo = (
+                    bairro_tipo_top.set_index([bairro_col, tipo_ingresso_col])["TDL Sum Tickets (B+S-A)"]
+                    .unstack(fill_value=0)
+                    .astype(int)
+                )
                 # Adiciona total por bairro
                 tabela_bairro_tipo['Total'] = tabela_bairro_tipo.sum(axis=1)
                 tabela_bairro_tipo = tabela_bairro_tipo.sort_values('Total', ascending=False)
@@ -1,6 +1,11 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from graficos.formatacao import SEPARADORES_BR, formatar_br
+from graficos.exportacao import csv_sob_demanda
+
+# Ordem de exibição dos dias da semana
+ORDEM_DIAS = ("Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo")
 
 
 def get_plotly_config(escala=2):
@@ -29,6 +34,11 @@ def get_font_sizes(escala=2):
     }
 
 
+def formatar_moeda_br(serie):
+    """Formata uma série de valores como moeda brasileira (R$ 1.234,56)"""
+    return "R$ " + serie.map("{:,.2f}".format).str.translate(SEPARADORES_BR)
+
+
 def grafico_vendas_ao_longo_do_tempo(df_b, escala=2):
     """Exibe gráfico de linha mostrando ingressos vendidos ao longo do tempo"""
     st.markdown("#### Ingressos ao longo do tempo")
@@ -70,17 +80,22 @@ def analise_comportamento_compra(df_b, escala=2):
     """Exibe análises de comportamento de compra dos clientes"""
     st.markdown("### 🛒 Comportamento de Compra")
     
+    # Agrega por cliente uma única vez para todas as análises da seção
+    if not df_b.empty:
+        agregacoes = {
+            "TDL Sum Tickets (B+S-A)": ("TDL Sum Tickets (B+S-A)", "sum"),
+            "TDL Sum Ticket Net Price (B+S-A)": ("TDL Sum Ticket Net Price (B+S-A)", "sum")
+        }
+        if "TDL Event" in df_b.columns:
+            agregacoes["TDL Event"] = ("TDL Event", "nunique")
+        por_cliente = df_b.groupby("TDL Customer CPF", observed=True).agg(**agregacoes)
+    
     col_comp1, col_comp2 = st.columns(2)
     
     with col_comp1:
         st.markdown("#### Distribuição de Ingressos por Cliente")
         if not df_b.empty:
-            ingressos_por_cliente = (
-                df_b[df_b["TDL Customer CPF"].notna()]
-                .groupby("TDL Customer CPF")["TDL Sum Tickets (B+S-A)"]
-                .sum()
-                .reset_index()
-            )
+            ingressos_por_cliente = por_cliente[["TDL Sum Tickets (B+S-A)"]].reset_index()
             
             # Cria faixas de quantidade de ingressos
             ingressos_por_cliente["Faixa"] = pd.cut(
@@ -89,7 +104,8 @@ def analise_comportamento_compra(df_b, escala=2):
                 labels=["1 ingresso", "2 ingressos", "3 ingressos", "4-5 ingressos", "6-10 ingressos", "Mais de 10"]
             )
             
-            dist_faixa = ingressos_por_cliente["Faixa"].value_counts().sort_index().reset_index()
+            # Faixas já são categóricas ordenadas: sort=False devolve na ordem das faixas, sem reordenar
+            dist_faixa = ingressos_por_cliente["Faixa"].value_counts(sort=False).reset_index()
             dist_faixa.columns = ["Faixa", "Quantidade de Clientes"]
             
             # Calcula percentuais
@@ -102,7 +118,7 @@ def analise_comportamento_compra(df_b, escala=2):
                 y="Quantidade de Clientes",
                 labels={"Faixa": "Quantidade de Ingressos", "Quantidade de Clientes": "Clientes"},
                 title="Quantos ingressos cada cliente comprou?",
-                text=dist_faixa["Percentual"].apply(lambda x: f"{x}%")
+                text=dist_faixa["Percentual"].astype(str) + "%"
             )
             fonts = get_font_sizes(escala)
             fig_dist.update_traces(textposition='outside', textfont_size=fonts['annotation'])
@@ -122,17 +138,13 @@ def analise_comportamento_compra(df_b, escala=2):
         st.markdown("#### Top 10 Clientes (por quantidade de ingressos)")
         if not df_b.empty:
             top_clientes = (
-                df_b[df_b["TDL Customer CPF"].notna()]
-                .groupby("TDL Customer CPF")[["TDL Sum Tickets (B+S-A)", "TDL Sum Ticket Net Price (B+S-A)"]]
-                .sum()
+                por_cliente[["TDL Sum Tickets (B+S-A)", "TDL Sum Ticket Net Price (B+S-A)"]]
                 .reset_index()
                 .sort_values("TDL Sum Tickets (B+S-A)", ascending=False)
                 .head(10)
             )
             
-            top_clientes["Receita (R$)"] = top_clientes["TDL Sum Ticket Net Price (B+S-A)"].apply(
-                lambda x: f"R$ {x:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-            )
+            top_clientes["Receita (R$)"] = formatar_moeda_br(top_clientes["TDL Sum Ticket Net Price (B+S-A)"])
             
             display_top = top_clientes[["TDL Customer CPF", "TDL Sum Tickets (B+S-A)", "Receita (R$)"]]
             display_top.columns = ["CPF", "Ingressos", "Receita Total"]
@@ -147,21 +159,20 @@ def analise_comportamento_compra(df_b, escala=2):
                     
                     # Agrupa por CPF e dia da semana
                     detalhamento_dia = (
-                        df_top_detalhado.groupby(["TDL Customer CPF", "dia_semana_label"])["TDL Sum Tickets (B+S-A)"]
+                        df_top_detalhado.groupby(["TDL Customer CPF", "dia_semana_label"], observed=True)["TDL Sum Tickets (B+S-A)"]
                         .sum()
                         .reset_index()
                     )
                     
-                    # Cria tabela pivotada
-                    tabela_dia_semana = detalhamento_dia.pivot(
-                        index="TDL Customer CPF",
-                        columns="dia_semana_label",
-                        values="TDL Sum Tickets (B+S-A)"
-                    ).fillna(0).astype(int)
+                    # Cria tabela pivotada (unstack preenche com 0; inteiros mesmo se a coluna vier em float)
+                    tabela_dia_semana = (
+                        detalhamento_dia.set_index(["TDL Customer CPF", "dia_semana_label"])["TDL Sum Tickets (B+S-A)"]
+                        .unstack(fill_value=0)
+                        .astype(int)
+                    )
                     
                     # Ordena as colunas por dia da semana
-                    ordem_dias = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
-                    colunas_existentes = [dia for dia in ordem_dias if dia in tabela_dia_semana.columns]
+                    colunas_existentes = [dia for dia in ORDEM_DIAS if dia in tabela_dia_semana.columns]
                     tabela_dia_semana = tabela_dia_semana[colunas_existentes]
                     
                     # Adiciona coluna de total
@@ -177,26 +188,21 @@ def analise_comportamento_compra(df_b, escala=2):
     # Análise de recorrência
     st.markdown("#### Análise de Recorrência - Clientes em Múltiplos Eventos")
     if not df_b.empty and "TDL Event" in df_b.columns:
-        eventos_por_cliente = (
-            df_b[df_b["TDL Customer CPF"].notna()]
-            .groupby("TDL Customer CPF")["TDL Event"]
-            .nunique()
-            .reset_index()
-        )
+        eventos_por_cliente = por_cliente["TDL Event"].reset_index()
         eventos_por_cliente.columns = ["CPF", "Eventos_Diferentes"]
         
-        # Cria faixas
-        eventos_por_cliente["Faixa_Eventos"] = eventos_por_cliente["Eventos_Diferentes"].apply(
-            lambda x: f"{x} evento" if x == 1 else f"{x} eventos" if x <= 5 else "6+ eventos"
+        # Cria faixas já como categórica ordenada (sem texto por linha nem ordenação depois)
+        ordem_eventos = ["1 evento", "2 eventos", "3 eventos", "4 eventos", "5 eventos", "6+ eventos"]
+        eventos_por_cliente["Faixa_Eventos"] = pd.cut(
+            eventos_por_cliente["Eventos_Diferentes"],
+            bins=[0, 1, 2, 3, 4, 5, float('inf')],
+            labels=ordem_eventos
         )
         
-        dist_recorrencia = eventos_por_cliente["Faixa_Eventos"].value_counts().reset_index()
+        # sort=False mantém a ordem das faixas; só as faixas com clientes vão para o gráfico
+        dist_recorrencia = eventos_por_cliente["Faixa_Eventos"].value_counts(sort=False).reset_index()
         dist_recorrencia.columns = ["Eventos", "Clientes"]
-        
-        # Ordena as categorias
-        ordem_eventos = ["1 evento", "2 eventos", "3 eventos", "4 eventos", "5 eventos", "6+ eventos"]
-        dist_recorrencia["Eventos"] = pd.Categorical(dist_recorrencia["Eventos"], categories=ordem_eventos, ordered=True)
-        dist_recorrencia = dist_recorrencia.sort_values("Eventos")
+        dist_recorrencia = dist_recorrencia[dist_recorrencia["Clientes"] > 0]
         
         fig_recorrencia = px.pie(
             dist_recorrencia,
@@ -226,10 +232,9 @@ def analise_turismo_por_periodo(df_b, escala=2):
         st.info("Não há dados disponíveis para análise.")
         return
     
-    # Adiciona coluna de mês/ano
-    df_analise = df_b.copy()
-    df_analise["Mes_Ano"] = df_analise["TDL Event Date"].dt.to_period('M').astype(str)
-    df_analise["Mes_Nome"] = df_analise["TDL Event Date"].dt.strftime('%B/%Y')
+    # Mês/ano como Series soltas (sem copiar a base para acrescentar colunas)
+    mes_ano = df_b["TDL Event Date"].dt.to_period('M').astype(str).rename("Mes_Ano")
+    mes_nome = df_b["TDL Event Date"].dt.strftime('%B/%Y').rename("Mes_Nome")
     
     # Mapeamento de meses em português
     meses_pt = {
@@ -239,7 +244,7 @@ def analise_turismo_por_periodo(df_b, escala=2):
         'October': 'Outubro', 'November': 'Novembro', 'December': 'Dezembro'
     }
     for en, pt in meses_pt.items():
-        df_analise["Mes_Nome"] = df_analise["Mes_Nome"].str.replace(en, pt)
+        mes_nome = mes_nome.str.replace(en, pt)
     
     # Classifica origem: Rio de Janeiro, Outros Estados, Internacional
     def classificar_origem(row):
@@ -261,11 +266,11 @@ def analise_turismo_por_periodo(df_b, escala=2):
         else:
             return "Outros Estados (Brasil)"
     
-    df_analise["Origem_Classificada"] = df_analise.apply(classificar_origem, axis=1)
+    origem = df_b.apply(classificar_origem, axis=1).rename("Origem_Classificada")
     
-    # Agrupa por mês e origem
+    # Agrupa por mês e origem (Series como chaves do groupby)
     evolucao = (
-        df_analise.groupby(["Mes_Ano", "Mes_Nome", "Origem_Classificada"])["TDL Sum Tickets (B+S-A)"]
+        df_b["TDL Sum Tickets (B+S-A)"].groupby([mes_ano, mes_nome, origem])
         .sum()
         .reset_index()
     )
@@ -316,6 +321,8 @@ def analise_turismo_por_periodo(df_b, escala=2):
     
     # Gráfico 2: Evolução em percentuais
     st.markdown("#### 📈 Evolução do Público por Origem (Percentuais)")
+    # Rótulos montados em bloco (sem f-string por linha); fatias de até 5% ficam sem texto
+    rotulos_perc = (evolucao["Percentual"].round(1).astype(str) + "%").where(evolucao["Percentual"] > 5, "")
     fig_perc = px.bar(
         evolucao,
         x="Mes_Nome",
@@ -325,7 +332,7 @@ def analise_turismo_por_periodo(df_b, escala=2):
         labels={"Mes_Nome": "Mês", "Percentual": "Percentual (%)"},
         barmode="stack",
         color_discrete_map=cores_origem,
-        text=evolucao["Percentual"].apply(lambda x: f"{x:.1f}%" if x > 5 else "")
+        text=rotulos_perc
     )
     
     fig_perc.update_traces(textposition='inside', textfont_size=fonts['annotation'])
@@ -410,7 +417,7 @@ def analise_turismo_por_periodo(df_b, escala=2):
     evolucao_export = evolucao[["Mes_Nome", "Origem", "Ingressos", "Percentual", "Total_Mes"]].copy()
     evolucao_export.columns = ["Mês", "Origem", "Ingressos", "Percentual (%)", "Total do Mês"]
     
-    csv_evolucao = evolucao_export.to_csv(index=False, encoding='utf-8-sig')
+    csv_evolucao = csv_sob_demanda(evolucao_export)
     st.download_button(
         label="📥 Download Evolução do Público por Origem (CSV)",
         data=csv_evolucao,
@@ -420,14 +427,14 @@ def analise_turismo_por_periodo(df_b, escala=2):
     )
     
     # Top estados brasileiros (excluindo RJ)
-    coluna_uf = "uf_google" if "uf_google" in df_analise.columns else "TDL Customer State"
-    if coluna_uf in df_analise.columns:
+    coluna_uf = "uf_google" if "uf_google" in df_b.columns else "TDL Customer State"
+    if coluna_uf in df_b.columns:
         st.markdown("---")
         st.markdown("#### 🗺️ Top 10 Estados de Origem (excluindo RJ)")
         
-        estados_outros = df_analise[
-            (df_analise[coluna_uf].notna()) &
-            (~df_analise[coluna_uf].str.upper().isin(["RJ", "RIO DE JANEIRO"]))
+        estados_outros = df_b[
+            (df_b[coluna_uf].notna()) &
+            (~df_b[coluna_uf].str.upper().isin(["RJ", "RIO DE JANEIRO"]))
         ]
         
         if not estados_outros.empty:
@@ -468,18 +475,18 @@ def analise_turismo_por_periodo(df_b, escala=2):
                 st.dataframe(top_estados_display, hide_index=True, use_container_width=True)
     
     # Top países (excluindo Brasil)
-    if "TDL Customer Country" in df_analise.columns:
+    if "TDL Customer Country" in df_b.columns:
         st.markdown("---")
         st.markdown("#### 🌎 Top 10 Países de Origem (excluindo Brasil)")
         
-        paises_outros = df_analise[
-            (df_analise["TDL Customer Country"].notna()) &
-            (~df_analise["TDL Customer Country"].str.upper().isin(["BRAZIL", "BRASIL", "BR"]))
+        paises_outros = df_b[
+            (df_b["TDL Customer Country"].notna()) &
+            (~df_b["TDL Customer Country"].str.upper().isin(["BRAZIL", "BRASIL", "BR"]))
         ]
         
         if not paises_outros.empty:
             top_paises = (
-                paises_outros.groupby("TDL Customer Country")["TDL Sum Tickets (B+S-A)"]
+                paises_outros.groupby("TDL Customer Country", observed=True)["TDL Sum Tickets (B+S-A)"]
                 .sum()
                 .reset_index()
                 .sort_values("TDL Sum Tickets (B+S-A)", ascending=False)
@@ -513,7 +520,7 @@ def analise_turismo_por_periodo(df_b, escala=2):
                 st.dataframe(top_paises, hide_index=True, use_container_width=True)
     
     # Botão de download
-    csv_evolucao = evolucao.to_csv(index=False, encoding='utf-8-sig')
+    csv_evolucao = csv_sob_demanda(evolucao)
     st.download_button(
         label="📥 Download Análise Completa (CSV)",
         data=csv_evolucao,
@@ -534,7 +541,7 @@ def ranking_eventos_por_publico(df_b, escala=2):
     # Agrupa por evento e soma ingressos e receita
     ranking = (
         df_b[df_b["TDL Event"].notna()]
-        .groupby("TDL Event")
+        .groupby("TDL Event", observed=True)
         .agg({
             "TDL Sum Tickets (B+S-A)": "sum",
             "TDL Sum Ticket Net Price (B+S-A)": "sum",
@@ -567,7 +574,7 @@ def ranking_eventos_por_publico(df_b, escala=2):
             labels={"Total de Ingressos": "Ingressos Vendidos", "Evento": "Evento"},
             color="Total de Ingressos",
             color_continuous_scale="Blues",
-            text=ranking["Percentual"].apply(lambda x: f"{x}%")
+            text=ranking["Percentual"].astype(str) + "%"
         )
         
         fonts = get_font_sizes(escala)
@@ -589,7 +596,7 @@ def ranking_eventos_por_publico(df_b, escala=2):
         st.markdown("#### 📊 Resumo Geral")
         st.metric("Total de Eventos", len(ranking))
         st.metric("Total de Ingressos", f"{int(total_geral):,}".replace(",", "."))
-        st.metric("Receita Total", f"R$ {ranking['Receita Total (R$)'].sum():,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+        st.metric("Receita Total", f"R$ {formatar_br(ranking['Receita Total (R$)'].sum())}")
         
         if len(ranking) > 0:
             evento_top = ranking.iloc[0]
@@ -606,19 +613,15 @@ def ranking_eventos_por_publico(df_b, escala=2):
     # Formata os valores para exibição
     ranking_display = ranking.copy()
     ranking_display["Total de Ingressos"] = ranking_display["Total de Ingressos"].astype(int)
-    ranking_display["Receita Total (R$)"] = ranking_display["Receita Total (R$)"].apply(
-        lambda x: f"R$ {x:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    )
-    ranking_display["Ticket Médio (R$)"] = ranking_display["Ticket Médio (R$)"].apply(
-        lambda x: f"R$ {x:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    )
-    ranking_display["Percentual"] = ranking_display["Percentual"].apply(lambda x: f"{x}%")
+    ranking_display["Receita Total (R$)"] = formatar_moeda_br(ranking_display["Receita Total (R$)"])
+    ranking_display["Ticket Médio (R$)"] = formatar_moeda_br(ranking_display["Ticket Médio (R$)"])
+    ranking_display["Percentual"] = ranking_display["Percentual"].astype(str) + "%"
     ranking_display.index = range(1, len(ranking_display) + 1)
     
     st.dataframe(ranking_display, use_container_width=True)
     
     # Botão de download
-    csv_ranking = ranking_display.to_csv(index=True, encoding='utf-8-sig')
+    csv_ranking = csv_sob_demanda(ranking_display, index=True)
     st.download_button(
         label="📥 Download Ranking Completo (CSV)",
         data=csv_ranking,
@@ -670,7 +673,7 @@ def grafico_pizza_tipo_ingresso_por_evento(df_b, escala=2):
     # Agrupa por tipo de ingresso
     tipo_ingresso_count = (
         df_filtrado[df_filtrado[tipo_ingresso_col].notna()]
-        .groupby(tipo_ingresso_col)["TDL Sum Tickets (B+S-A)"]
+        .groupby(tipo_ingresso_col, observed=True)["TDL Sum Tickets (B+S-A)"]
         .sum()
         .reset_index()
     )
@@ -718,14 +721,14 @@ def grafico_pizza_tipo_ingresso_por_evento(df_b, escala=2):
         # Exibe tabela com os dados
         tipo_ingresso_display = tipo_ingresso_count.copy()
         tipo_ingresso_display["Quantidade"] = tipo_ingresso_display["Quantidade"].astype(int)
-        tipo_ingresso_display["Percentual"] = tipo_ingresso_display["Percentual"].apply(lambda x: f"{x}%")
+        tipo_ingresso_display["Percentual"] = tipo_ingresso_display["Percentual"].astype(str) + "%"
         tipo_ingresso_display.index = range(1, len(tipo_ingresso_display) + 1)
         
         st.markdown("#### Detalhamento")
         st.dataframe(tipo_ingresso_display, use_container_width=True, height=500)
     
     # Botão de download
-    csv_tipo_ingresso = tipo_ingresso_display.to_csv(index=True, encoding='utf-8-sig')
+    csv_tipo_ingresso = csv_sob_demanda(tipo_ingresso_display, index=True)
     st.download_button(
         label="📥 Download Dados (CSV)",
         data=csv_tipo_ingresso,
@@ -742,7 +745,7 @@ def grafico_pizza_tipo_ingresso_por_evento(df_b, escala=2):
         # Cria tabela cruzada: eventos x tipos de ingresso
         comparacao = (
             df_b[df_b[tipo_ingresso_col].notna() & df_b["TDL Event"].notna()]
-            .groupby(["TDL Event", tipo_ingresso_col])["TDL Sum Tickets (B+S-A)"]
+            .groupby(["TDL Event", tipo_ingresso_col], observed=True)["TDL Sum Tickets (B+S-A)"]
             .sum()
             .reset_index()
         )
@@ -774,12 +777,12 @@ def grafico_pizza_tipo_ingresso_por_evento(df_b, escala=2):
         st.plotly_chart(fig_comparacao, use_container_width=True, config=get_plotly_config(escala))
         
         with st.expander("📊 Ver dados da comparação"):
-            # Cria tabela pivotada para melhor visualização
-            tabela_comparacao = comparacao.pivot(
-                index="Evento",
-                columns="Tipo de Ingresso",
-                values="Quantidade"
-            ).fillna(0).astype(int)
+            # Cria tabela pivotada (unstack preenche com 0; inteiros mesmo se a coluna vier em float)
+            tabela_comparacao = (
+                comparacao.set_index(["Evento", "Tipo de Ingresso"])["Quantidade"]
+                .unstack(fill_value=0)
+                .astype(int)
+            )
             
             # Adiciona coluna de total
             tabela_comparacao["Total"] = tabela_comparacao.sum(axis=1)